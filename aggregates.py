@@ -0,0 +1,124 @@
+from sheets import assignment_ws, contest_ws, mock_ws
+from analytics import get_str_safe, to_number, verdict
+from views import View
+
+
+# =========================
+# Per-student summary
+# =========================
+
+class StudentSummary:
+    """Running placement figures for one student"""
+
+    __slots__ = (
+        "marks_sum",
+        "assignments",
+        "contests",
+        "qualifying_contests",
+        "mocks",
+        "mocks_passed",
+    )
+
+    def __init__(self):
+        self.marks_sum = 0
+        self.assignments = 0
+        self.contests = 0
+        self.qualifying_contests = 0  # score >= 50 and rank <= 10
+        self.mocks = 0
+        self.mocks_passed = 0
+
+    def is_empty(self):
+        return not (self.assignments or self.contests or self.mocks)
+
+    def verdict(self, registration_id):
+        avg_marks = self.marks_sum / self.assignments if self.assignments else 0
+
+        return verdict(
+            registration_id,
+            avg_marks,
+            self.assignments,
+            bool(self.qualifying_contests),
+            self.contests,
+            self.mocks_passed > 0,
+            self.mocks,
+        )
+
+
+# =========================
+# Record shares
+# =========================
+# Each turns one typed record into (registration_id, share) where
+# share(summary, sign) adds (+1) or subtracts (-1) the record's part.
+# Blank numbers count as 0.
+
+def assignment_share(record):
+    marks = record.marks or 0
+
+    def apply(summary, sign):
+        summary.assignments += sign
+        summary.marks_sum += sign * marks
+
+    return record.registration_id, apply
+
+
+def contest_share(record):
+    score = record.score or 0
+    qualifies = score >= 50 and (to_number(record.rank) or 0) <= 10
+
+    def apply(summary, sign):
+        summary.contests += sign
+        summary.qualifying_contests += sign * qualifies
+
+    return record.registration_id, apply
+
+
+def mock_share(record):
+    passed = (record.score or 0) >= 60 and get_str_safe(record.status) == "pass"
+
+    def apply(summary, sign):
+        summary.mocks += sign
+        summary.mocks_passed += sign * passed
+
+    return record.registration_id, apply
+
+
+# =========================
+# Materialized aggregates
+# =========================
+
+class Aggregates(View):
+    """registration_id -> StudentSummary over the assignment, contest and mock tabs"""
+
+    def __init__(self, sources):
+        self.sources = sources  # table -> record share
+        super().__init__(sources)
+
+    def empty(self):
+        return {}
+
+    def apply(self, students, ws, record, sign):
+        registration_id, share = self.sources[ws](record)
+        if registration_id is None:
+            return  # the columnar engine leaves these rows out too
+
+        summary = students.get(registration_id)
+        if summary is None:
+            summary = students[registration_id] = StudentSummary()
+
+        share(summary, sign)
+
+        if summary.is_empty():
+            del students[registration_id]
+
+    def get(self, registration_id):
+        return self.fresh().get(registration_id)
+
+    async def aget(self, registration_id):
+        return (await self.afresh()).get(registration_id)
+
+
+aggregates = Aggregates({
+    assignment_ws: assignment_share,
+    contest_ws: contest_share,
+    mock_ws: mock_share,
+})
@@ -0,0 +1,211 @@
+import asyncio
+import threading
+from operator import attrgetter
+
+import numpy as np
+
+from sheets import assignment_ws, contest_ws, mock_ws
+from schema import parse_int
+
+
+# =========================
+# Parsing
+# =========================
+
+def to_number(value):
+    """Parse a number held in a text field; None when it is blank or not a number"""
+    return parse_int(str(value))
+
+
+def get_str_safe(value):
+    """Convert a value to lowercase string safely"""
+    return str(value).strip().lower() if value else ""
+
+
+def column(records, name, dtype, parse=None):
+    """One field of every typed record as an array; blanks count as 0"""
+    values = map(attrgetter(name), (record for _, record in records))
+    if parse:
+        values = map(parse, values)
+
+    return np.fromiter(
+        (0 if value is None else value for value in values),
+        dtype=dtype,
+        count=len(records),
+    )
+
+
+# =========================
+# Columnar tabs
+# =========================
+# Each tab's typed records are turned into arrays once per table version;
+# later calls reuse the arrays until a write or a reload changes the table.
+# The arrays are stored under the version their records were read at, so
+# a write that lands during the build cannot hide behind an older version.
+
+_columns = {}
+_columns_lock = threading.Lock()
+
+
+def cached_columns(ws, build):
+    # fresh_version() reloads the tab once its TTL is up
+    version = ws.fresh_version()
+
+    with _columns_lock:
+        cached = _columns.get(ws.title)
+        if cached and cached[0] == version:
+            return cached[1]
+
+    version, records = ws.versioned_records()
+    # A row without a registration_id belongs to no student; as a 0 it
+    # would show up as one
+    records = [(n, record) for n, record in records if record.registration_id is not None]
+    columns = build(records)
+
+    if version is not None:
+        with _columns_lock:
+            _columns[ws.title] = (version, columns)
+
+    return columns
+
+
+def assignment_columns():
+    def build(records):
+        return {
+            "registration_id": column(records, "registration_id", np.int64),
+            "marks": column(records, "marks", np.float64),
+        }
+
+    return cached_columns(assignment_ws, build)
+
+
+def contest_columns():
+    def build(records):
+        score = column(records, "score", np.float64)
+        # rank is free text in the model
+        rank = column(records, "rank", np.float64, parse=to_number)
+        return {
+            "registration_id": column(records, "registration_id", np.int64),
+            "qualifies": (score >= 50) & (rank <= 10),
+        }
+
+    return cached_columns(contest_ws, build)
+
+
+def mock_columns():
+    def build(records):
+        score = column(records, "score", np.float64)
+        passed = column(records, "status", bool, parse=lambda v: get_str_safe(v) == "pass")
+        return {
+            "registration_id": column(records, "registration_id", np.int64),
+            "qualifies": (score >= 60) & passed,
+        }
+
+    return cached_columns(mock_ws, build)
+
+
+# =========================
+# Readiness
+# =========================
+
+def verdict(registration_id, avg_marks, assignments, contest_ok, contests, mock_ok, mocks):
+    """Placement response for one student from their reduced numbers"""
+    reasons_not_ready = []
+
+    if assignments:
+        if avg_marks < 40:
+            reasons_not_ready.append(f"Average assignment marks too low ({avg_marks:.1f})")
+    else:
+        avg_marks = 0
+        reasons_not_ready.append("No assignments submitted")
+
+    if not contest_ok:
+        if contests:
+            reasons_not_ready.append("Coding contest requirements not met (score >=50 and rank <=10)")
+        else:
+            reasons_not_ready.append("No coding contests participated")
+
+    if not mock_ok:
+        if mocks:
+            reasons_not_ready.append("Mock interview requirements not met (score >=60 and status 'pass')")
+        else:
+            reasons_not_ready.append("No mock interviews conducted")
+
+    placement_ready = avg_marks >= 40 and contest_ok and mock_ok
+
+    return {
+        "registration_id": registration_id,
+        "average_assignment_marks": avg_marks,
+        "coding_contest_pass": contest_ok,
+        "mock_interview_pass": mock_ok,
+        "placement_ready": "Yes" if placement_ready else "No",
+        "reasons_not_ready": reasons_not_ready if reasons_not_ready else ["All criteria met"]
+    }
+
+
+def readiness(assignments, contests, mocks, registration_ids=None):
+    """
+    Verdicts for every student, or just `registration_ids`, in one pass.
+
+    A student exists if they appear in any of the three tabs. Rows are
+    mapped to a dense student position with searchsorted and every
+    per-student figure is a bincount over those positions.
+    """
+    ids = np.union1d(
+        np.union1d(assignments["registration_id"], contests["registration_id"]),
+        mocks["registration_id"],
+    )
+    n = len(ids)
+
+    def counts(tab, weights=None, where=None):
+        positions = np.searchsorted(ids, tab["registration_id"])
+        if where is not None:
+            positions = positions[where]
+            weights = None if weights is None else weights[where]
+        return np.bincount(positions, weights=weights, minlength=n)
+
+    assignment_count = counts(assignments)
+    marks_sum = counts(assignments, weights=assignments["marks"])
+    contest_count = counts(contests)
+    contest_ok = counts(contests, where=contests["qualifies"]) > 0
+    mock_count = counts(mocks)
+    mock_ok = counts(mocks, where=mocks["qualifies"]) > 0
+
+    avg_marks = np.divide(
+        marks_sum, assignment_count,
+        out=np.zeros(n), where=assignment_count > 0,
+    )
+
+    if registration_ids is None:
+        positions = range(n)
+        not_found = []
+    else:
+        wanted = np.asarray(registration_ids, dtype=np.int64)
+        found = np.isin(wanted, ids)
+        positions = np.searchsorted(ids, wanted[found]).tolist()
+        not_found = wanted[~found].tolist()
+
+    results = [
+        verdict(
+            int(ids[i]),
+            float(avg_marks[i]),
+            int(assignment_count[i]),
+            bool(contest_ok[i]),
+            int(contest_count[i]),
+            bool(mock_ok[i]),
+            int(mock_count[i]),
+        )
+        for i in positions
+    ]
+
+    return results, not_found
+
+
+async def areadiness(registration_ids=None):
+    """readiness() with the three tabs loaded concurrently off the event loop"""
+    assignments, contests, mocks = await asyncio.gather(
+        asyncio.to_thread(assignment_columns),
+        asyncio.to_thread(contest_columns),
+        asyncio.to_thread(mock_columns),
+    )
+    return readiness(assignments, contests, mocks, registration_ids)
@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+
+
+# -------------------------
+# Request body
+# -------------------------
+
+async def bulk_payload(request: Request):
+    """Body of a bulk import as a list of dicts, from a JSON array or CSV"""
+    body = await request.body()
+
+    if "csv" in request.headers.get("content-type", ""):
+        reader = csv.DictReader(io.StringIO(body.decode("utf-8-sig")))
+
+        # Empty cells mean "not given", so model defaults apply
+        return [
+            {
+                key.strip(): value
+                for key, value in row.items()
+                if key and value not in ("", None)
+            }
+            for row in reader
+        ]
+
+    try:
+        items = json.loads(body)
+    except ValueError:
+        raise HTTPException(400, "Body must be a JSON array or a CSV file")
+
+    if not isinstance(items, list):
+        raise HTTPException(400, "Body must be a JSON array or a CSV file")
+
+    return items
+
+
+# -------------------------
+# Import
+# -------------------------
+
+def describe_errors(error: ValidationError):
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}"
+        for e in error.errors()
+    )
+
+
+async def bulk_insert(ws, model, items, headers, key, to_row=None):
+    """
+    Validate `items` against `model` and append the new ones in one call.
+
+    Rows are de-duplicated on `key` against the cached copy of the tab and
+    against each other. Nothing is written when every row is rejected.
+    """
+    accepted = []
+    rejected = []
+    rows = []
+    seen = set()
+
+    for index, item in enumerate(items):
+        try:
+            record = model.model_validate(item)
+        except ValidationError as e:
+            rejected.append({"index": index, "reason": describe_errors(e)})
+            continue
+
+        record_key = tuple(getattr(record, k) for k in key)
+
+        if record_key in seen:
+            rejected.append({"index": index, "reason": "Duplicate in upload"})
+            continue
+
+        row_number, _ = await ws.afind(*record_key)
+        if row_number:
+            rejected.append({"index": index, "reason": "Already exists"})
+            continue
+
+        seen.add(record_key)
+
+        if to_row:
+            rows.append(to_row(record))
+        else:
+            data = record.model_dump()
+            rows.append([data.get(col, "") for col in headers])
+
+        accepted.append(dict(zip(key, record_key)))
+
+    if rows:
+        await ws.aappend_rows(rows)
+
+    return {
+        "message": f"{len(accepted)} added, {len(rejected)} rejected",
+        "accepted": accepted,
+        "rejected": rejected,
+    }
@@ -0,0 +1,989 @@
+import asyncio
+import logging
+import os
+import pickle
+import threading
+import time
+
+from gspread.utils import rowcol_to_a1
+
+from etags import etag_matches, row_etag
+from indexes import Index, make_key
+from storage import PreconditionFailed, RecordNotFound, StorageUnavailable, Table, to_cell
+from write_queue import WRITE_BEHIND, WriteQueue, write_quota
+
+logger = logging.getLogger(__name__)
+
+# -------------------------
+# Settings
+# -------------------------
+# Seconds a loaded tab is served from memory before it is re-read from
+# Google Sheets. Set to 0 to re-read on every request.
+CACHE_TTL = float(os.environ.get("SHEETS_CACHE_TTL", "60"))
+
+# Deletes mark the row in the DELETED_COLUMN column instead of removing it;
+# compact() removes marked rows later. Set to false to delete rows at once.
+SOFT_DELETE = os.environ.get("SHEETS_SOFT_DELETE", "true").lower() in ["true", "yes", "1"]
+
+DELETED_COLUMN = "_deleted"
+
+
+# -------------------------
+# Tombstones
+# -------------------------
+
+def marker_column(values):
+    """0-based position of the tombstone column, or None while the tab has none"""
+    if values and DELETED_COLUMN in values[0]:
+        return values[0].index(DELETED_COLUMN)
+    return None
+
+
+def is_tombstone(row, col):
+    return col is not None and col < len(row) and row[col].strip().upper() == "TRUE"
+
+
+def trimmed(row):
+    """A row without its trailing blank cells, as Google returns it"""
+    end = len(row)
+    while end and row[end - 1] == "":
+        end -= 1
+    return list(row[:end])
+
+
+def runs(row_numbers):
+    """Sorted row numbers as (start, end) runs of consecutive rows"""
+    result = []
+    for r in row_numbers:
+        if result and result[-1][1] == r - 1:
+            result[-1] = (result[-1][0], r)
+        else:
+            result.append((r, r))
+    return result
+
+
+# -------------------------
+# Cached worksheet
+# -------------------------
+
+class CachedWorksheet(Table):
+    """
+    In-memory copy of one worksheet.
+
+    The tab is downloaded once and reads are served from memory until the
+    TTL runs out.
+
+    With `write_behind` (the default), writes are applied to the local copy
+    at once and queued; a WriteQueue sends them to Google in merged
+    batches, within the write quota. While writes are pending the local
+    copy is the newest data there is, so reloads are put off until the
+    queue is empty. Without it, writes go to Google first and are applied
+    locally only after the remote call succeeded.
+
+    With `soft_delete`, delete_rows() only sets the row's DELETED_COLUMN
+    cell. Marked rows (tombstones) are left out of every read and index,
+    and no row moves, so row numbers stay valid until compact() removes
+    the tombstones in one pass.
+
+    `key` names the primary-key columns and `indexes` the columns that get
+    a secondary index; both are kept in step with every local write. So is
+    the typed copy: every row is parsed through `schema` once, when the tab
+    is loaded or the row is written, and record()/records() hand out the
+    parsed records.
+
+    Two locks are used: `_write_lock` serialises the slow remote calls
+    (writes and reloads), while `_lock` only guards the in-memory copy, so
+    readers never wait on Google.
+
+    `open_worksheet` is called on first use to get the gspread worksheet,
+    so nothing touches the network until a request needs this tab.
+    """
+
+    def __init__(self, open_worksheet, title, key=(), indexes=(), schema=None, ttl=CACHE_TTL,
+                 write_behind=WRITE_BEHIND, soft_delete=SOFT_DELETE):
+        self._open_worksheet = open_worksheet
+        self._worksheet = None
+        self.title = title
+        self.ttl = ttl
+        self._key_columns = tuple(key)
+        self._index_columns = tuple(indexes)
+        self.key = Index(key) if key else None
+        self.indexes = {column: Index([column]) for column in indexes}
+        self.soft_delete = soft_delete
+        self.schema = schema
+        self._values = None
+        self._records = None  # parsed rows, parallel to _values (None for the header)
+        self._tombstones = set()
+        self._deleted_col = None
+        self._loaded_at = 0.0
+        self._etags = {}
+        self.version = 0
+        self._lock = threading.RLock()
+        self._write_lock = threading.RLock()
+        # Set while compact() deletes rows; queued writes wait on the
+        # condition instead of numbering rows the delete is about to shift
+        self._compacting = False
+        self._compacted = threading.Condition(self._lock)
+        self._queue = WriteQueue(title, self._send, self._on_write_failure) if write_behind else None
+
+    @property
+    def worksheet(self):
+        if self._worksheet is None:
+            with self._write_lock:
+                if self._worksheet is None:
+                    try:
+                        self._worksheet = self._open_worksheet()
+                    except Exception as e:
+                        raise StorageUnavailable(f"Cannot open worksheet '{self.title}'") from e
+        return self._worksheet
+
+    # ---------- loading ----------
+
+    def _is_fresh(self):
+        return (
+            self._values is not None
+            and time.monotonic() - self._loaded_at < self.ttl
+        )
+
+    def _has_pending(self):
+        return self._queue is not None and len(self._queue) > 0
+
+    def _keep_local_copy(self):
+        with self._lock:
+            self._loaded_at = time.monotonic()
+
+    def refresh(self):
+        """Re-download the whole tab, unless queued writes have not reached it yet"""
+        with self._write_lock:
+            if self._has_pending():
+                self._keep_local_copy()
+                return
+
+            try:
+                values = self.worksheet.get_all_values()
+            except StorageUnavailable:
+                raise
+            except Exception as e:
+                raise StorageUnavailable(f"Cannot read worksheet '{self.title}'") from e
+
+            with self._lock:
+                if values == self._values:
+                    # Nothing changed: keep the version, so ETags handed
+                    # out from this copy stay valid
+                    self._loaded_at = time.monotonic()
+                    return
+
+            deleted_col = marker_column(values)
+            tombstones = {
+                n for n, row in enumerate(values[1:], start=2)
+                if is_tombstone(row, deleted_col)
+            }
+
+            # Indexes are built aside and swapped in, so readers keep using
+            # the old copy until the new one is complete
+            key = Index(self._key_columns) if self._key_columns else None
+            indexes = {column: Index([column]) for column in self._index_columns}
+            for index in ([key] if key else []) + list(indexes.values()):
+                index.build(values, tombstones)
+            records = self._parse(values)
+
+            with self._lock:
+                if self._has_pending():
+                    # A write was queued while we downloaded
+                    self._loaded_at = time.monotonic()
+                    return
+
+                self._values = values
+                self._records = records
+                self._tombstones = tombstones
+                self._deleted_col = deleted_col
+                self._etags = {}
+                self.key = key
+                self.indexes = indexes
+                self._loaded_at = time.monotonic()
+                self.version += 1
+
+    def invalidate(self):
+        """Mark the local copy stale; the next read reloads it"""
+        with self._lock:
+            self._loaded_at = 0.0
+
+    # ---------- snapshots ----------
+
+    def snapshot(self):
+        """The local copy and its indexes, pickled; None while the tab is not loaded"""
+        with self._lock:
+            if self._values is None:
+                return None
+
+            return pickle.dumps(
+                {
+                    "values": self._values,
+                    "tombstones": self._tombstones,
+                    "deleted_col": self._deleted_col,
+                    "key": self.key,
+                    "indexes": self.indexes,
+                },
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+
+    def restore(self, data):
+        """
+        Serve a snapshot() until the next reload; returns whether it was used.
+
+        Ignored once the tab has been loaded from Google. Indexes saved for
+        other columns than this table's are rebuilt from the values.
+        """
+        state = pickle.loads(data)
+
+        key, indexes = state["key"], state["indexes"]
+        if (key.columns if key else ()) != self._key_columns or tuple(indexes) != self._index_columns:
+            key = Index(self._key_columns) if self._key_columns else None
+            indexes = {column: Index([column]) for column in self._index_columns}
+            for index in ([key] if key else []) + list(indexes.values()):
+                index.build(state["values"], state["tombstones"])
+        records = self._parse(state["values"])
+
+        with self._write_lock:
+            if self._values is not None:
+                return False
+
+            with self._lock:
+                self._values = state["values"]
+                self._records = records
+                self._tombstones = state["tombstones"]
+                self._deleted_col = state["deleted_col"]
+                self.key = key
+                self.indexes = indexes
+                self._etags = {}
+                self._loaded_at = time.monotonic()
+                self.version += 1
+
+        return True
+
+    def _parse(self, values):
+        return [None] + [self.schema.parse(row) for row in values[1:]] if values else []
+
+    def _load(self):
+        if not self._is_fresh():
+            with self._write_lock:
+                if not self._is_fresh():
+                    self.refresh()
+        return self._values
+
+    # ---------- indexes ----------
+
+    def _all_indexes(self):
+        if self.key:
+            yield self.key
+        yield from self.indexes.values()
+
+    def _build_indexes(self):
+        for index in self._all_indexes():
+            index.build(self._values, self._tombstones)
+
+    def _index_add(self, row, row_number):
+        for index in self._all_indexes():
+            index.add(row, row_number)
+
+    def _index_remove(self, row, row_number):
+        for index in self._all_indexes():
+            index.remove(row, row_number)
+
+    # ---------- reads ----------
+
+    def _snapshot(self):
+        """The local copy and its tombstoned row numbers, taken together"""
+        self._load()
+
+        with self._lock:
+            return list(self._values), set(self._tombstones)
+
+    def get_all_values(self):
+        values, dead = self._snapshot()
+
+        if not dead:
+            return values
+
+        return [row for n, row in enumerate(values, start=1) if n not in dead]
+
+    def get_all_records(self):
+        values = self.get_all_values()
+
+        if not values:
+            return []
+
+        header = values[0]
+        return [dict(zip(header, row)) for row in values[1:]]
+
+    def get_all_rows(self):
+        """(row number, cells) of every record, in sheet order"""
+        values, dead = self._snapshot()
+        return [
+            (n, row) for n, row in enumerate(values[1:], start=2)
+            if n not in dead
+        ]
+
+    def iter_rows(self, chunk_size=1000):
+        # Slices of one snapshot; rows appended meanwhile are not included
+        values, dead = self._snapshot()
+        for start in range(1, len(values), chunk_size):
+            chunk = [
+                (n, row) for n, row in enumerate(values[start:start + chunk_size], start=start + 1)
+                if n not in dead
+            ]
+            if chunk:
+                yield chunk
+
+    def record(self, row_number, cells):
+        with self._lock:
+            # Rows are replaced, never changed in place, so the same list
+            # object still has the record parsed for it
+            if row_number <= len(self._values or ()) and self._values[row_number - 1] is cells:
+                return self._records[row_number - 1]
+
+        return self.schema.parse(cells)
+
+    def records(self):
+        return self.versioned_records()[1]
+
+    def versioned_records(self):
+        self._load()
+
+        with self._lock:
+            version = self.version
+            records, dead = list(self._records), set(self._tombstones)
+
+        return version, [
+            (n, record) for n, record in enumerate(records[1:], start=2)
+            if n not in dead
+        ]
+
+    def has_index(self, column):
+        return column in self.indexes
+
+    def fresh_version(self):
+        self._load()
+        return self.version
+
+    def etag(self, row_number, cells):
+        # Every write puts a new list in the row's place, so a hash cached
+        # against the same list object is still current
+        cached = self._etags.get(row_number)
+        if cached and cached[0] is cells:
+            return cached[1]
+
+        etag = row_etag(cells)
+        self._etags[row_number] = (cells, etag)
+        return etag
+
+    def find(self, *key):
+        """Row number and cells of the record with this primary key"""
+        self._load()
+
+        with self._lock:
+            row_number = self.key.first(key)
+
+            if row_number is None:
+                return None, None
+
+            return row_number, self._values[row_number - 1]
+
+    def find_all(self, column, value):
+        """(row number, cells) of every record whose `column` equals value"""
+        self._load()
+
+        with self._lock:
+            return [
+                (r, self._values[r - 1])
+                for r in self.indexes[column].get([value])
+            ]
+
+    # ---------- local copy ----------
+
+    def _apply_append(self, rows):
+        with self._lock:
+            version = self.version
+            self.version += 1
+
+            if self._values is None:
+                return
+
+            added = []
+            for cells in rows:
+                self._values.append([to_cell(v) for v in cells])
+
+                if len(self._values) == 1:
+                    self._records = [None]
+                    self._deleted_col = marker_column(self._values)
+                    self._build_indexes()
+                else:
+                    self._records.append(self.schema.parse(self._values[-1]))
+                    self._index_add(self._values[-1], len(self._values))
+                    added.append(self._values[-1])
+
+            self._notify(version, [], added)
+
+    def _apply_update(self, row, changes):
+        with self._lock:
+            version = self.version
+            self.version += 1
+
+            if self._values is None or row > len(self._values):
+                return
+
+            old = self._values[row - 1]
+            cells = list(old)
+            cells += [""] * (max(changes) - len(cells))
+            for col, value in changes.items():
+                cells[col - 1] = to_cell(value)
+            self._values[row - 1] = cells
+            if row > 1:
+                self._records[row - 1] = self.schema.parse(cells)
+
+            self._index_remove(old, row)
+            self._index_add(cells, row)
+
+            self._notify(version, [old], [cells])
+
+    def _apply_delete(self, start_index, end_index):
+        with self._lock:
+            version = self.version
+            self.version += 1
+
+            if self._values is None:
+                return
+
+            # Tombstones were already reported as removed when they were marked
+            removed = [
+                row for n, row in enumerate(self._values[start_index - 1:end_index], start=start_index)
+                if n not in self._tombstones
+            ]
+            del self._values[start_index - 1:end_index]
+            del self._records[start_index - 1:end_index]
+
+            for index in self._all_indexes():
+                index.shift(start_index, end_index)
+
+            count = end_index - start_index + 1
+            self._tombstones = {
+                r if r < start_index else r - count
+                for r in self._tombstones
+                if not start_index <= r <= end_index
+            }
+
+            self._notify(version, removed, [])
+
+    def _apply_tombstone(self, cells):
+        with self._lock:
+            version = self.version
+            self.version += 1
+
+            if self._values is None:
+                return
+
+            removed = []
+            for (row, col), value in cells.items():
+                if row > len(self._values):
+                    continue
+
+                old = self._values[row - 1]
+                new = list(old) + [""] * (col - len(old))
+                new[col - 1] = to_cell(value)
+                self._values[row - 1] = new
+
+                if row > 1 and row not in self._tombstones:
+                    self._index_remove(old, row)
+                    self._tombstones.add(row)
+                    removed.append(old)
+
+            self._deleted_col = marker_column(self._values)
+            self._notify(version, removed, [])
+
+    # ---------- writes ----------
+    # Each write is built as (queued op, remote call, local apply) and then
+    # run by _write(), or by _enqueue() when the caller already holds _lock.
+
+    def _write(self, op, remote, apply):
+        """Queue one write, or run it against Google straight away without a queue"""
+        if self._queue is None:
+            return self._write_now(remote, apply)
+
+        self._load()
+        self._enqueue(op, remote, apply)
+
+    def _write_now(self, remote, apply):
+        with self._write_lock:
+            write_quota.take()
+            result = remote()
+            apply()
+            return result
+
+    def _wait_for_compaction(self):
+        # Call with _lock held; waiting releases it
+        while self._compacting:
+            self._compacted.wait()
+
+    def _enqueue(self, op, remote, apply):
+        # Applied and queued under one lock, so the queue holds the writes
+        # in the order the local copy saw them
+        with self._lock:
+            self._wait_for_compaction()
+            if op[0] != "append":
+                op = op + (self._row_keys(op),)
+            apply()
+            self._queue.put(op)
+
+    def _row_keys(self, op):
+        """Key each row an update or delete touches holds now, checked again when it is sent"""
+        positions = self.key.positions if self.key else None
+        if positions is None:
+            return {}
+
+        if op[0] == "update":
+            rows = {row for row, _ in op[1]}
+        else:
+            rows = {r for start, end in op[1] for r in range(start, end + 1)}
+
+        return {
+            row: make_key(self._values[row - 1][p] for p in positions)
+            for row in rows
+            if 1 < row <= len(self._values) and len(self._values[row - 1]) > max(positions)
+        }
+
+    def _update(self, row, changes):
+        return self._update_rows([row], changes)
+
+    def _update_rows(self, rows, changes):
+        cells = {(row, col): value for row in rows for col, value in changes.items()}
+
+        def apply():
+            for row in rows:
+                self._apply_update(row, changes)
+
+        return (
+            ("update", cells),
+            lambda: self._send_updates(cells),
+            apply,
+        )
+
+    def _remove_runs(self, ranges):
+        """Delete (start, end) runs in the order given, which must be bottom-up"""
+        ranges = list(ranges)
+
+        def apply():
+            for start, end in ranges:
+                self._apply_delete(start, end)
+
+        return (
+            ("delete", ranges),
+            lambda: self._send_deletes(ranges),
+            apply,
+        )
+
+    def _mark_deleted(self, start_index, end_index):
+        return self._mark_rows_deleted(range(start_index, end_index + 1))
+
+    def _mark_rows_deleted(self, rows):
+        """Tombstone rows by setting their DELETED_COLUMN cell; needs the tab loaded"""
+        with self._lock:
+            col = self._deleted_col
+            cells = {}
+
+            if col is None:
+                # First soft delete on this tab: add the column after the
+                # widest row so no existing cell is overwritten
+                col = max(len(row) for row in self._values)
+                cells[(1, col + 1)] = DELETED_COLUMN
+
+            for row in rows:
+                cells[(row, col + 1)] = True
+
+        return (
+            ("update", cells),
+            lambda: self._send_updates(cells),
+            lambda: self._apply_tombstone(cells),
+        )
+
+    def _delete(self, start_index, end_index):
+        return self._delete_rows(range(start_index, end_index + 1))
+
+    def _delete_rows(self, rows):
+        if self.soft_delete:
+            return self._mark_rows_deleted(rows)
+        return self._remove_runs(reversed(runs(sorted(rows))))
+
+    def append_row(self, values, **kwargs):
+        return self._write(
+            ("append", [values], kwargs),
+            lambda: self.worksheet.append_row(values, **kwargs),
+            lambda: self._apply_append([values]),
+        )
+
+    def append_rows(self, values, **kwargs):
+        return self._write(
+            ("append", list(values), kwargs),
+            lambda: self.worksheet.append_rows(values, **kwargs),
+            lambda: self._apply_append(values),
+        )
+
+    def update_cell(self, row, col, value):
+        return self._write(
+            ("update", {(row, col): value}),
+            lambda: self.worksheet.update_cell(row, col, value),
+            lambda: self._apply_update(row, {col: value}),
+        )
+
+    def update_row(self, row, changes):
+        """
+        Write several cells of one row in a single batched request.
+
+        `changes` maps 1-based column numbers to values. Either every cell
+        is written or, if the request fails, none of them is.
+        """
+        if not changes:
+            return None
+
+        return self._write(*self._update(row, changes))
+
+    def delete_rows(self, start_index, end_index=None):
+        if self.soft_delete:
+            self._load()
+        return self._write(*self._delete(start_index, end_index or start_index))
+
+    def compact(self):
+        """
+        Remove tombstoned rows for good; returns how many were removed.
+
+        Another worker may have moved rows since this copy was loaded, so
+        queued writes are sent first, the tab is downloaded again and the
+        marked rows are read back from Google right before the delete.
+        Only rows still marked and still holding the same cells go; the
+        delete is sent at once rather than queued.
+        """
+        self.flush()
+
+        with self._write_lock:
+            with self._lock:
+                if self._has_pending():
+                    return 0  # a write came in meanwhile; try again next round
+                # Queued writes wait until the delete is applied; readers
+                # carry on with the local copy
+                self._compacting = True
+
+            try:
+                return self._compact()
+            finally:
+                with self._lock:
+                    self._compacting = False
+                    self._compacted.notify_all()
+
+    def _compact(self):
+        self.refresh()
+
+        with self._lock:
+            dead = sorted(self._tombstones)
+            expected = {n: trimmed(self._values[n - 1]) for n in dead}
+
+        if not dead:
+            return 0
+
+        current = self._read_rows(dead)
+        confirmed = [
+            n for n in dead
+            if is_tombstone(current[n], self._deleted_col) and current[n] == expected[n]
+        ]
+
+        if len(confirmed) < len(dead):
+            self.invalidate()
+
+        if not confirmed:
+            return 0
+
+        # Bottom-up in one request, so the runs still to go keep their row
+        # numbers
+        _, remote, apply = self._remove_runs(reversed(runs(confirmed)))
+
+        write_quota.take()
+        remote()
+        with self._lock:
+            apply()
+
+        return len(confirmed)
+
+    # ---------- checked writes ----------
+
+    def _holds(self, cells, key):
+        positions = self.key.positions
+        return (
+            positions is not None
+            and len(cells) > max(positions)
+            and make_key(cells[p] for p in positions) == make_key(key)
+            and not is_tombstone(cells, self._deleted_col)
+        )
+
+    def _locate(self, key, etag, verify):
+        """
+        Row number of the record with this key, checked for a write.
+
+        With `verify` the row is read back from Google, so rows moved by
+        another worker are noticed; the tab is then reloaded and the key
+        looked up again.
+        """
+        row = self.key.first(key)
+        if row is None:
+            raise RecordNotFound(f"Record not found in '{self.title}'")
+
+        cells = self._values[row - 1]
+
+        if verify:
+            cells = self.worksheet.row_values(row)
+
+            if not self._holds(cells, key):
+                self.refresh()
+                row = self.key.first(key)
+                if row is None:
+                    raise RecordNotFound(f"Record not found in '{self.title}'")
+
+                cells = self.worksheet.row_values(row)
+                if not self._holds(cells, key):
+                    raise PreconditionFailed(f"Record in '{self.title}' is being moved, try again")
+
+        if not etag_matches(etag, row_etag(cells)):
+            raise PreconditionFailed(f"Record in '{self.title}' has changed")
+
+        return row
+
+    def _write_record(self, key, etag, build, returning=False):
+        """
+        Locate, check and write one record without letting another write in between.
+
+        A write carrying an If-Match ETag is never queued: this worker's
+        queued writes are sent first, then the row is read back from
+        Google and its ETag compared right before the write, so two
+        workers holding the same ETag cannot both succeed.
+        """
+        conditional = etag is not None and etag.strip() != "*"
+
+        if self._queue is None or conditional:
+            self.flush()
+
+            with self._write_lock:
+                self._load()
+                row = self._locate(key, etag, verify=True)
+                _, remote, apply = build(row)
+                self._write_now(remote, apply)
+                with self._lock:
+                    return list(self._values[row - 1]) if returning else None
+
+        self._load()
+
+        with self._lock:
+            self._wait_for_compaction()
+            row = self._locate(key, etag, verify=False)
+            self._enqueue(*build(row))
+            return list(self._values[row - 1]) if returning else None
+
+    def update_record(self, key, changes, etag=None):
+        return self._write_record(
+            key, etag, lambda row: self._update(row, changes), returning=True,
+        )
+
+    def delete_record(self, key, etag=None):
+        self._write_record(key, etag, lambda row: self._delete(row, row))
+
+    # ---------- writes by secondary index ----------
+
+    def _write_all(self, column, value, build):
+        """Find every row whose `column` equals value and write them with one request"""
+        if self._queue is None:
+            with self._write_lock:
+                # Re-read first, so rows another worker moved are not
+                # written by stale row numbers
+                self.refresh()
+                rows = list(self.indexes[column].get([value]))
+                if rows:
+                    self._write(*build(rows))
+                return len(rows)
+
+        self._load()
+
+        with self._lock:
+            self._wait_for_compaction()
+            rows = list(self.indexes[column].get([value]))
+            if rows:
+                self._enqueue(*build(rows))
+            return len(rows)
+
+    def update_all(self, column, value, changes):
+        if not changes:
+            return 0
+        return self._write_all(column, value, lambda rows: self._update_rows(rows, changes))
+
+    def delete_all(self, column, value):
+        return self._write_all(column, value, self._delete_rows)
+
+    # ---------- flushing ----------
+
+    def _read_rows(self, rows):
+        """Row number -> cells of those rows as Google has them now, in one request"""
+        try:
+            ranges = self.worksheet.batch_get([f"{n}:{n}" for n in rows])
+        except Exception as e:
+            raise StorageUnavailable(f"Cannot read worksheet '{self.title}'") from e
+
+        return {n: trimmed(values[0]) if values else [] for n, values in zip(rows, ranges)}
+
+    def _send_updates(self, cells):
+        return self.worksheet.batch_update(
+            [
+                {"range": rowcol_to_a1(row, col), "values": [[value]]}
+                for (row, col), value in cells.items()
+            ],
+            value_input_option="USER_ENTERED",
+        )
+
+    def _send_deletes(self, ranges):
+        # One request; Google applies the deletions in order, just as the
+        # local copy did
+        worksheet = self.worksheet
+        return worksheet.spreadsheet.batch_update({
+            "requests": [
+                {
+                    "deleteDimension": {
+                        "range": {
+                            "sheetId": worksheet.id,
+                            "dimension": "ROWS",
+                            "startIndex": start - 1,
+                            "endIndex": end,
+                        }
+                    }
+                }
+                for start, end in ranges
+            ]
+        })
+
+    def _sheet_keys(self):
+        """
+        Key of every row as Google has it now, None for the header and
+        tombstoned rows; one request for the key and tombstone columns
+        """
+        columns = list(self.key.positions)
+        marker = None
+        if self._deleted_col is not None:
+            marker = len(columns)
+            columns.append(self._deleted_col)
+
+        letters = [rowcol_to_a1(1, c + 1)[:-1] for c in columns]
+
+        try:
+            ranges = self.worksheet.batch_get(
+                [f"{letter}:{letter}" for letter in letters], major_dimension="COLUMNS",
+            )
+        except Exception as e:
+            raise StorageUnavailable(f"Cannot read worksheet '{self.title}'") from e
+
+        values = [r[0] if r else [] for r in ranges]
+        height = max(len(v) for v in values)
+        rows = [[v[i] if i < len(v) else "" for v in values] for i in range(height)]
+
+        return [
+            None if i == 0 or is_tombstone(row, marker) else make_key(row[:len(self.key.positions)])
+            for i, row in enumerate(rows)
+        ]
+
+    @staticmethod
+    def _resolve(sheet, row, expected):
+        """Where the row queued as `row`, holding `expected`, is on the sheet now; None when gone"""
+        if expected is None or (row <= len(sheet) and sheet[row - 1] == expected):
+            return row
+        if expected in sheet:
+            return sheet.index(expected) + 1
+        return None
+
+    def _verified_updates(self, cells, keys):
+        """`cells` with every keyed row moved to where Google has that key now"""
+        sheet = self._sheet_keys()
+        rows = {row: self._resolve(sheet, row, keys.get(row)) for row, _ in cells}
+
+        moved = {row: to for row, to in rows.items() if to != row}
+        if moved:
+            logger.warning("Rows of '%s' moved before queued updates were sent: %s", self.title, moved)
+            self.invalidate()
+
+        return {
+            (rows[row], col): value
+            for (row, col), value in cells.items()
+            if rows[row] is not None
+        }
+
+    def _verified_deletes(self, ranges, keys):
+        """`ranges` with every keyed row moved to where Google has that key now"""
+        sheet = self._sheet_keys()
+        verified = []
+        moved = False
+
+        for (start, end), expected in zip(ranges, keys):
+            rows = []
+            for row in range(start, end + 1):
+                to = self._resolve(sheet, row, expected.get(row))
+                moved = moved or to != row
+                if to is not None:
+                    rows.append(to)
+
+            # Bottom-up, so the sheet simulated here shifts as Google's will
+            for row in sorted(set(rows), reverse=True):
+                if row <= len(sheet):
+                    del sheet[row - 1]
+            verified.extend(reversed(runs(sorted(set(rows)))))
+
+        if moved:
+            logger.warning("Rows of '%s' moved before queued deletes were sent", self.title)
+            self.invalidate()
+
+        return verified
+
+    def _send(self, kind, payload):
+        """
+        Send one merged batch from the write queue.
+
+        Updates and deletes carry the keys their rows held when queued;
+        those are checked against the sheet first, so a row another worker
+        moved in the meantime is found again, and one that is gone is
+        skipped, instead of writing over whatever row now has its number.
+        """
+        with self._write_lock:
+            if kind == "append":
+                rows, kwargs = payload
+                return self.worksheet.append_rows(rows, **kwargs)
+
+            if kind == "update":
+                cells, keys = payload
+                if keys:
+                    cells = self._verified_updates(cells, keys)
+                return self._send_updates(cells) if cells else None
+
+            ranges, keys = payload
+            if any(keys):
+                ranges = self._verified_deletes(ranges, keys)
+            return self._send_deletes(ranges) if ranges else None
+
+    def _on_write_failure(self, error):
+        # The local copy now has writes the sheet never got: reload from
+        # Google once the rest of the queue is through
+        with self._lock:
+            self._loaded_at = 0.0
+
+    def flush(self, max_attempts=None):
+        """Send every queued write now"""
+        if self._queue is not None:
+            self._queue.flush(max_attempts)
+
+    # ---------- async ----------
+    # Reads run in place when the copy is fresh and only hop to a worker
+    # thread when Google has to be asked.
+
+    async def _read(self, method, *args):
+        if self._is_fresh():
+            return method(*args)
+        return await asyncio.to_thread(method, *args)
@@ -0,0 +1,65 @@
+import os
+
+from starlette.datastructures import Headers, MutableHeaders
+
+# -------------------------
+# Settings
+# -------------------------
+# Cache-Control sent with successful GET responses (and their 304s), per
+# router. Each one can be replaced with CACHE_CONTROL_<ROUTER>, e.g.
+# CACHE_CONTROL_BATCHES="public, max-age=300"; an empty value sends none.
+# "no-cache" lets browsers and CDNs keep a response but revalidate it
+# first, which the ETags turn into a cheap 304.
+DEFAULTS = {
+    "students": "no-cache",
+    "batches": "no-cache",
+    "assignments": "no-cache",
+    "contests": "no-cache",
+    "mocks": "no-cache",
+    "placement": "max-age=30",
+    "changes": "no-store",
+}
+
+CACHE_CONTROL = {
+    f"/{router}": os.environ.get(f"CACHE_CONTROL_{router.upper()}", value)
+    for router, value in DEFAULTS.items()
+}
+
+
+def cache_control(path):
+    """The Cache-Control value for a request path, or None"""
+    for prefix, value in CACHE_CONTROL.items():
+        if path == prefix or path.startswith(prefix + "/"):
+            return value or None
+    return None
+
+
+# -------------------------
+# Middleware
+# -------------------------
+
+class CacheControlMiddleware:
+    """Adds the router's Cache-Control to GET responses that do not set their own"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        value = None
+        if scope["type"] == "http" and scope["method"] in ("GET", "HEAD"):
+            value = cache_control(scope["path"])
+
+        if value is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cache_control(message):
+            if (
+                message["type"] == "http.response.start"
+                and message["status"] in (200, 304)
+                and "cache-control" not in Headers(raw=message["headers"])
+            ):
+                MutableHeaders(raw=message["headers"])["Cache-Control"] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_cache_control)
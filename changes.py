@@ -0,0 +1,165 @@
+import asyncio
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+
+from sheets import TABLES, tables
+from etags import EPOCH
+
+# -------------------------
+# Settings
+# -------------------------
+# Changes kept in memory; a client further behind than this must refetch
+CHANGE_LOG_SIZE = int(os.environ.get("CHANGE_LOG_SIZE", "10000"))
+
+# Tab name -> the resource name the routers use
+RESOURCES = {
+    "students": "students",
+    "batches": "batches",
+    "assignment": "assignments",
+    "contest": "contests",
+    "mock": "mocks",
+}
+
+
+def to_record(tab, cells):
+    return tables[tab].schema.parse(cells)._asdict()
+
+
+# -------------------------
+# Change ids
+# -------------------------
+# Clients resume from an id of the form "{EPOCH}:{seq}". Sequence numbers
+# are local to one process, so an id from another worker or from before a
+# restart carries another epoch and means the client must reset.
+
+def change_id(seq):
+    return f"{EPOCH}:{seq}"
+
+
+def parse_change_id(value):
+    """
+    Sequence number of a change id, or None when it belongs to another
+    epoch. "0" means the start of the log. Raises ValueError otherwise.
+    """
+    value = value.strip()
+    if value == "0":
+        return 0
+
+    epoch, sep, seq = value.partition(":")
+    if not sep or not seq.isdigit():
+        raise ValueError(f"Invalid change id: {value!r}")
+
+    return int(seq) if epoch == EPOCH else None
+
+
+# -------------------------
+# Change log
+# -------------------------
+
+class ChangeLog:
+    """
+    Sequence-numbered log of every create, update and delete.
+
+    It listens to the tables, so every write the routers make, single or
+    bulk, is logged without the handlers doing anything. Numbers start at
+    1 and are local to this process; clients see them as change ids
+    qualified with EPOCH (see change_id()).
+    """
+
+    def __init__(self, tabs, size=CHANGE_LOG_SIZE):
+        self.entries = deque(maxlen=size)
+        self.seq = 0
+        self.lock = threading.Lock()
+        self._waiters = set()
+        self._tabs = {}
+
+        for tab, ws in tabs.items():
+            self._tabs[ws.title] = tab
+            ws.subscribe(self.on_change)
+
+    def on_change(self, ws, version_before, removed, added):
+        tab = self._tabs[ws.title]
+
+        if removed and added:
+            changes = [("update", new) for new in added]
+        elif added:
+            changes = [("create", new) for new in added]
+        else:
+            changes = [("delete", old) for old in removed]
+
+        at = datetime.now(timezone.utc).isoformat()
+
+        with self.lock:
+            for op, cells in changes:
+                record = to_record(tab, cells)
+                self.seq += 1
+                self.entries.append({
+                    "id": change_id(self.seq),
+                    "seq": self.seq,
+                    "resource": RESOURCES[tab],
+                    "op": op,
+                    "key": {k: record[k] for k in TABLES[tab]["key"]},
+                    "record": record if op != "delete" else None,
+                    "at": at,
+                })
+
+            waiters = list(self._waiters)
+
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def since(self, seq, limit):
+        """
+        Up to `limit` changes after `seq`, and whether the client must reset.
+
+        A reset is needed when changes after `seq` have already been
+        dropped from the log, or when `seq` comes from another process.
+        """
+        with self.lock:
+            oldest = self.entries[0]["seq"] if self.entries else self.seq + 1
+
+            if seq > self.seq or seq < oldest - 1:
+                return [], True
+
+            start = seq - oldest + 1
+            end = min(start + limit, len(self.entries))
+            return [self.entries[i] for i in range(start, end)], False
+
+    async def wait(self, seq, timeout):
+        """Wait until there is a change after `seq`, or `timeout` seconds pass"""
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+
+        with self.lock:
+            if self.seq > seq:
+                return
+            self._waiters.add(waiter)
+
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self.lock:
+                self._waiters.discard(waiter)
+
+
+changelog = ChangeLog(tables)
+
+
+def changes_response(since, limit):
+    """Changes after sequence number `since`; None (another epoch) is a reset"""
+    if since is None:
+        changes, reset = [], True
+    else:
+        changes, reset = changelog.since(since, limit)
+
+    return {
+        "epoch": EPOCH,
+        "last_id": change_id(changelog.seq),
+        "last_seq": changelog.seq,
+        "reset": reset,
+        "changes": changes,
+    }
@@ -0,0 +1,168 @@
+import gzip
+import os
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+# -------------------------
+# Settings
+# -------------------------
+# Bodies smaller than this many bytes are sent uncompressed
+COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", "1024"))
+
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", "5"))
+
+# Offered in this order of preference
+ENCODINGS = ["br", "gzip"] if brotli else ["gzip"]
+
+
+# -------------------------
+# Negotiation
+# -------------------------
+
+def negotiate(accept_encoding):
+    """The preferred encoding the client accepts, or None"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        params = params.strip()
+
+        try:
+            q = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            q = 0.0
+
+        accepted[name.strip().lower()] = q
+
+    for encoding in ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+
+    return None
+
+
+def accepted_encoding(request):
+    return negotiate(request.headers.get("accept-encoding", ""))
+
+
+# -------------------------
+# Compressors
+# -------------------------
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class StreamCompressor:
+    """Compresses a body chunk by chunk; every chunk is flushed so it goes out at once"""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data):
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+# -------------------------
+# Middleware
+# -------------------------
+
+def compressible(start):
+    headers = Headers(raw=start["headers"])
+    return (
+        start["status"] not in (204, 304)
+        and "content-encoding" not in headers
+        and "no-transform" not in headers.get("cache-control", "")
+        # Event streams must reach the client event by event
+        and not headers.get("content-type", "").startswith("text/event-stream")
+    )
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with the best encoding the client accepts.
+
+    Bodies already carrying a Content-Encoding, like the precompressed
+    list responses, pass through untouched, as do small ones and event
+    streams. Streamed bodies are compressed chunk by chunk.
+    """
+
+    def __init__(self, app, minimum_size=COMPRESS_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        encoding = None
+        if scope["type"] == "http":
+            encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                start = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                if not compressible(start) or (not more_body and len(body) < self.minimum_size):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                headers = MutableHeaders(raw=start["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+
+                if not more_body:
+                    body = compress(body, encoding)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                del headers["Content-Length"]
+                compressor = StreamCompressor(encoding)
+                await send(start)
+
+            body = compressor.chunk(body)
+            if not more_body:
+                body += compressor.finish()
+
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,73 @@
+import hashlib
+import os
+import secrets
+from typing import Optional
+
+from fastapi import Header, HTTPException, Request, Response
+
+# -------------------------
+# Settings
+# -------------------------
+# Refuse PATCH and DELETE without an If-Match header (428)
+REQUIRE_IF_MATCH = os.environ.get("REQUIRE_IF_MATCH", "false").lower() in ["true", "yes", "1"]
+
+# Table versions are counters local to this process; list ETags carry this
+# random epoch so another worker or a restart never reuses one
+EPOCH = secrets.token_hex(4)
+
+
+# -------------------------
+# Record ETags
+# -------------------------
+
+def row_etag(cells):
+    """
+    Strong ETag of one record, hashed from its cells.
+
+    Trailing blank cells are ignored, so the sheet's trimmed rows, the
+    cache's padded ones and SQLite's fixed-width ones hash the same.
+    """
+    cells = list(cells)
+    while cells and cells[-1] == "":
+        cells.pop()
+
+    digest = hashlib.blake2b("\x1f".join(cells).encode(), digest_size=8).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_match, etag):
+    """Whether an If-Match value lets a write go ahead on a record with `etag`"""
+    if if_match is None or if_match.strip() == "*":
+        return True
+    return etag in (tag.strip() for tag in if_match.split(","))
+
+
+def if_match_header(if_match: Optional[str] = Header(None)):
+    if if_match is None and REQUIRE_IF_MATCH:
+        raise HTTPException(428, "If-Match header required")
+    return if_match
+
+
+# -------------------------
+# Conditional GET
+# -------------------------
+
+def list_etag(version, request: Request):
+    """Weak ETag of a list response: the tab's version plus the URL it was asked with"""
+    token = f"{version}|{request.url.path}|{request.url.query}"
+    digest = hashlib.blake2b(token.encode(), digest_size=8).hexdigest()
+    return f'W/"{EPOCH}-{digest}"'
+
+
+def not_modified(request: Request, etag):
+    """A 304 when If-None-Match already names `etag`, otherwise None"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+
+    # If-None-Match compares weakly
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    if "*" in tags or etag.removeprefix("W/") in tags:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    return None
@@ -0,0 +1,46 @@
+import csv
+import io
+
+from fastapi.responses import StreamingResponse
+
+from responses import encode
+
+EXPORT_FORMATS = "^(ndjson|csv)$"
+
+
+def ndjson_lines(ws, to_record):
+    for chunk in ws.iter_rows():
+        yield b"".join(encode(to_record(ws.record(n, row))) + b"\n" for n, row in chunk)
+
+
+def csv_lines(ws, headers, to_record):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(headers)
+
+    for chunk in ws.iter_rows():
+        for n, row in chunk:
+            record = to_record(ws.record(n, row))
+            writer.writerow([record[col] for col in headers])
+
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def export_response(ws, headers, to_record, format, filename):
+    """Stream a whole tab as NDJSON or CSV, one chunk of rows at a time"""
+    if format == "csv":
+        return StreamingResponse(
+            csv_lines(ws, headers, to_record),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.csv"'},
+        )
+
+    return StreamingResponse(
+        ndjson_lines(ws, to_record),
+        media_type="application/x-ndjson",
+    )
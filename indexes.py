@@ -0,0 +1,87 @@
+from bisect import insort
+
+
+def make_key(values):
+    """Normalise lookup values the same way the old row scans compared them"""
+    return tuple(str(v).strip() for v in values)
+
+
+class Index:
+    """
+    Hash index from the values of one or more columns to sheet row numbers.
+
+    Row numbers are 1-based like gspread's, so the header is row 1 and the
+    first record is row 2. Each key keeps its rows in ascending order; a
+    primary-key lookup takes the first one, which is the row the old linear
+    scans would have returned.
+    """
+
+    def __init__(self, columns):
+        self.columns = tuple(columns)
+        self.positions = None
+        self._rows = {}
+
+    def _key_of(self, row):
+        if not row or len(row) <= max(self.positions):
+            return None
+        return make_key(row[p] for p in self.positions)
+
+    def build(self, values, exclude=()):
+        """Index every record of a get_all_values() result, except rows in `exclude`"""
+        self._rows = {}
+
+        if not values:
+            self.positions = None
+            return
+
+        header = [h.strip() for h in values[0]]
+        if not all(c in header for c in self.columns):
+            self.positions = None
+            return
+
+        self.positions = tuple(header.index(c) for c in self.columns)
+
+        for i, row in enumerate(values[1:], start=2):
+            if i not in exclude:
+                self.add(row, i)
+
+    def add(self, row, row_number):
+        if self.positions is None:
+            return
+
+        key = self._key_of(row)
+        if key is not None:
+            insort(self._rows.setdefault(key, []), row_number)
+
+    def remove(self, row, row_number):
+        if self.positions is None:
+            return
+
+        key = self._key_of(row)
+        rows = self._rows.get(key)
+        if rows and row_number in rows:
+            rows.remove(row_number)
+            if not rows:
+                del self._rows[key]
+
+    def shift(self, start, end):
+        """Account for delete_rows(start, end) moving later rows up"""
+        count = end - start + 1
+
+        for key in list(self._rows):
+            rows = [
+                r if r < start else r - count
+                for r in self._rows[key]
+                if not start <= r <= end
+            ]
+            if rows:
+                self._rows[key] = rows
+            else:
+                del self._rows[key]
+
+    def get(self, key):
+        return self._rows.get(make_key(key), [])
+
+    def first(self, key):
+        rows = self.get(key)
+        return rows[0] if rows else None
@@ -0,0 +1,185 @@
+from bisect import bisect_left, insort
+
+from sheets import contest_ws, students_ws
+from analytics import to_number
+from views import View
+
+
+# =========================
+# Sorted board
+# =========================
+
+class SortedBoard:
+    """
+    Students kept in leaderboard order.
+
+    `entries` is a sorted list of (sort_key, registration_id), so top-k is
+    a slice and a student's position is a bisect.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.keys = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def set(self, registration_id, sort_key):
+        self.discard(registration_id)
+        self.keys[registration_id] = sort_key
+        insort(self.entries, (sort_key, registration_id))
+
+    def discard(self, registration_id):
+        sort_key = self.keys.pop(registration_id, None)
+        if sort_key is not None:
+            i = bisect_left(self.entries, (sort_key, registration_id))
+            del self.entries[i]
+
+    def position(self, registration_id):
+        """0-based place of a student, or None when not on the board"""
+        sort_key = self.keys.get(registration_id)
+        if sort_key is None:
+            return None
+        return bisect_left(self.entries, (sort_key, registration_id))
+
+    def page(self, offset, limit):
+        return self.entries[offset:offset + limit]
+
+
+# =========================
+# Leaderboards
+# =========================
+
+def contest_fields(record):
+    return (
+        record.contest_id,
+        record.registration_id,
+        record.score,
+        to_number(record.rank),  # free text in the model
+    )
+
+
+class ContestLeaderboards(View):
+    """contest_id -> board ordered by score (high first), then contest rank"""
+
+    def empty(self):
+        return {}
+
+    def apply(self, boards, ws, record, sign):
+        contest_id, registration_id, score, rank = contest_fields(record)
+        if registration_id is None or score is None:
+            return
+
+        board = boards.setdefault(contest_id, SortedBoard())
+
+        if sign > 0:
+            board.set(registration_id, (-score, float("inf") if rank is None else rank))
+        else:
+            board.discard(registration_id)
+            if not board:
+                del boards[contest_id]
+
+
+class BatchLeaderboards(View):
+    """
+    batch_id -> board ordered by total contest score in that batch.
+
+    A student's batch comes from the students tab, as in the batch
+    summaries; contest rows only add to the student's total.
+    """
+
+    def empty(self):
+        return {"boards": {}, "totals": {}, "batch_of": {}}
+
+    def apply(self, state, ws, record, sign):
+        registration_id = record.registration_id
+        if registration_id is None:
+            return
+
+        self._unplace(state, registration_id)
+
+        if ws is students_ws:
+            if sign > 0:
+                state["batch_of"][registration_id] = record.batch_id.strip()
+            else:
+                state["batch_of"].pop(registration_id, None)
+        else:
+            totals = state["totals"]
+            total, contests = totals.get(registration_id, (0, 0))
+            total += sign * (record.score or 0)
+            contests += sign
+
+            if contests:
+                totals[registration_id] = (total, contests)
+            else:
+                totals.pop(registration_id, None)
+
+        self._place(state, registration_id)
+
+    def _unplace(self, state, registration_id):
+        batch_id = state["batch_of"].get(registration_id)
+        board = state["boards"].get(batch_id)
+        if board is None:
+            return
+
+        board.discard(registration_id)
+        if not board:
+            del state["boards"][batch_id]
+
+    def _place(self, state, registration_id):
+        batch_id = state["batch_of"].get(registration_id)
+        totals = state["totals"].get(registration_id)
+        if batch_id is None or totals is None:
+            return
+
+        board = state["boards"].setdefault(batch_id, SortedBoard())
+        board.set(registration_id, (-totals[0],))
+
+
+contest_leaderboards = ContestLeaderboards([contest_ws])
+batch_leaderboards = BatchLeaderboards([students_ws, contest_ws])
+
+
+# =========================
+# Responses
+# =========================
+
+def leaderboard_page(board, entry, offset, limit, registration_id=None):
+    """Top-k page of a board plus, optionally, the caller's own place"""
+    with_positions = [
+        {"position": offset + i + 1, **entry(sort_key, reg_id)}
+        for i, (sort_key, reg_id) in enumerate(board.page(offset, limit))
+    ]
+
+    me = None
+    if registration_id is not None:
+        position = board.position(registration_id)
+        if position is not None:
+            me = {
+                "position": position + 1,
+                **entry(board.keys[registration_id], registration_id),
+            }
+
+    return {
+        "total": len(board),
+        "offset": offset,
+        "limit": limit,
+        "entries": with_positions,
+        "me": me,
+    }
+
+
+def contest_entry(sort_key, registration_id):
+    score, rank = sort_key
+    return {
+        "registration_id": registration_id,
+        "score": -score,
+        "rank": None if rank == float("inf") else rank,
+    }
+
+
+def batch_entry(sort_key, registration_id):
+    return {
+        "registration_id": registration_id,
+        "total_score": -sort_key[0],
+    }
@@ -0,0 +1,140 @@
+from fastapi import HTTPException, Request
+
+from etags import list_etag, not_modified
+from responses import cached_json
+from storage import to_cell
+
+
+def parse_fields(fields, headers):
+    """Validate a comma-separated `fields=` projection"""
+    if not fields:
+        return None
+
+    selected = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in headers]
+
+    if unknown:
+        raise HTTPException(400, f"Unknown fields: {', '.join(unknown)}")
+
+    return selected
+
+
+def parse_filters(ws, request: Request, headers):
+    """
+    Query parameters named after a column, parsed like that column's
+    cells, so `?placed=false` or `?fees=100.0` match what responses show
+    """
+    filters = {}
+
+    for col, value in request.query_params.items():
+        if col not in headers:
+            continue
+
+        parsed = ws.schema.parse_value(col, value)
+        if parsed is None and value.strip():
+            raise HTTPException(400, f"Invalid value for {col}")
+
+        filters[col] = parsed
+
+    return filters
+
+
+def matches(record, filters):
+    for col, value in filters.items():
+        field = getattr(record, col)
+        if isinstance(value, str):
+            field = (field or "").strip()
+        if field != value:
+            return False
+    return True
+
+
+def parse_cursor(cursor):
+    if cursor is None:
+        return 0
+
+    try:
+        return int(cursor)
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor")
+
+
+async def read_records(ws, filters, to_record, limit, after, selected):
+    """The filtered page of records and the headers that go with it"""
+    indexed = next((col for col in filters if ws.has_index(col)), None)
+
+    if indexed:
+        # The index holds cell text; every filter is still checked on the
+        # parsed records below
+        rows = await ws.afind_all(indexed, to_cell(filters[indexed]))
+    else:
+        rows = await ws.aget_all_rows()
+
+    records = []
+    last_row = None
+    next_cursor = None
+
+    for row_number, row in rows:
+        if row_number <= after:
+            continue
+
+        typed = ws.record(row_number, row)
+        if not matches(typed, filters):
+            continue
+
+        if limit is not None and len(records) == limit:
+            next_cursor = last_row
+            break
+
+        record = to_record(typed)
+        if selected:
+            record = {col: record[col] for col in selected}
+
+        records.append(record)
+        last_row = row_number
+
+    if next_cursor is not None:
+        return records, {"X-Next-Cursor": str(next_cursor)}
+
+    return records, {}
+
+
+async def list_records(
+    ws,
+    request: Request,
+    headers,
+    to_record,
+    limit=None,
+    cursor=None,
+    fields=None,
+):
+    """
+    Shared body of the GET / list endpoints.
+
+    Any query parameter named after a header column is an equality filter,
+    compared with the typed record field. The first filter on an indexed
+    column picks the candidate rows; the rest are checked against those
+    rows only. Rows come back in sheet
+    order, and when `limit` cuts the list short the cursor for the next
+    page is sent in the X-Next-Cursor header.
+
+    The ETag comes from the tab's version and the URL, so a poll whose
+    If-None-Match still matches gets a 304 before any row is read. The
+    body is encoded with orjson, compressed for the client's
+    Accept-Encoding and cached under that ETag, so repeating a request on
+    an unchanged tab sends the stored bytes.
+    """
+    selected = parse_fields(fields, headers)
+    after = parse_cursor(cursor)
+    filters = parse_filters(ws, request, headers)
+
+    etag = list_etag(await ws.afresh_version(), request)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    return await cached_json(
+        request,
+        etag,
+        lambda: read_records(ws, filters, to_record, limit, after, selected),
+    )
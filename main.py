@@ -1,5 +1,16 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+
+import sheets
+import snapshot
+from cache_control import CacheControlMiddleware
+from compression import COMPRESS_MIN_SIZE, CompressionMiddleware
+from storage import PreconditionFailed, RecordNotFound, StorageUnavailable
 
 from routes.students import router as students_router
 from routes.batches import router as batches_router
@@ -7,8 +18,62 @@ from routes.assignments import router as assignments_router
 from routes.contests import router as contests_router
 from routes.mocks import router as mocks_router
 from routes.placement import router as placement_router
+from routes.changes import router as changes_router
+
+logger = logging.getLogger(__name__)
+
+# ✅ Storage
+# Sheets are opened lazily, so the app boots without touching Google. Tabs
+# saved in the local snapshot serve reads from the first request; the
+# warm-up then reconciles them with Google in the background and never holds
+# up startup. Soft-deleted rows are compacted away and the snapshot is saved
+# in the background too, and writes still queued for Google are flushed on
+# shutdown.
+
+async def compact_periodically():
+    while True:
+        await asyncio.sleep(sheets.COMPACT_INTERVAL)
+        try:
+            await asyncio.to_thread(sheets.compact)
+        except Exception:
+            logger.exception("Compaction failed")
+
+
+async def save_snapshot_periodically():
+    while True:
+        await asyncio.sleep(snapshot.SNAPSHOT_INTERVAL)
+        try:
+            await asyncio.to_thread(snapshot.save)
+        except Exception:
+            logger.exception("Saving the snapshot failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await asyncio.to_thread(snapshot.restore)
+
+    tasks = []
+    if sheets.WARM_UP:
+        tasks.append(asyncio.create_task(asyncio.to_thread(sheets.warm_up)))
+    if sheets.COMPACT_INTERVAL > 0:
+        tasks.append(asyncio.create_task(compact_periodically()))
+    if snapshot.SNAPSHOT_PATH and snapshot.SNAPSHOT_INTERVAL > 0:
+        tasks.append(asyncio.create_task(save_snapshot_periodically()))
 
-app = FastAPI(title="Student Progress Management")
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.to_thread(sheets.flush_writes)
+        try:
+            await asyncio.to_thread(snapshot.save)
+        except Exception:
+            logger.exception("Saving the snapshot failed")
+
+
+app = FastAPI(title="Student Progress Management", lifespan=lifespan)
 
 # ✅ CORS configuration
 origins = [
@@ -25,10 +90,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ✅ Compression and caching headers
+# gzip (or brotli when installed) for bodies of COMPRESS_MIN_SIZE bytes and
+# up; list responses arrive already compressed from their cache and pass
+# through. Cache-Control is set per router, see cache_control.py.
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESS_MIN_SIZE)
+app.add_middleware(CacheControlMiddleware)
+
+@app.exception_handler(StorageUnavailable)
+async def storage_unavailable(request: Request, exc: StorageUnavailable):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+
+@app.exception_handler(RecordNotFound)
+async def record_not_found(request: Request, exc: RecordNotFound):
+    return JSONResponse(status_code=404, content={"detail": str(exc)})
+
+
+@app.exception_handler(PreconditionFailed)
+async def precondition_failed(request: Request, exc: PreconditionFailed):
+    return JSONResponse(status_code=412, content={"detail": str(exc)})
+
+
 # ✅ Include routers
 app.include_router(students_router, prefix="/students", tags=["Students"])
 app.include_router(batches_router, prefix="/batches", tags=["Batches"])
 app.include_router(assignments_router, prefix="/assignments", tags=["Assignments"])
 app.include_router(contests_router, prefix="/contests", tags=["Coding Contests"])
 app.include_router(mocks_router, prefix="/mocks", tags=["Mock Interviews"])
-app.include_router(placement_router, prefix="/placement", tags=["Placement"])
\ No newline at end of file
+app.include_router(placement_router, prefix="/placement", tags=["Placement"])
+app.include_router(changes_router, prefix="/changes", tags=["Changes"])
\ No newline at end of file
@@ -0,0 +1,135 @@
+from pydantic import BaseModel, EmailStr
+from typing import Optional
+
+# Request bodies of every tab. The Create models also give the column
+# types records are parsed into (see schema.py).
+
+
+# -------------------------
+# Students
+# -------------------------
+
+class StudentCreate(BaseModel):
+    registration_id: int
+    name: str
+    email: EmailStr
+    contact: str
+    degree: str
+    specialization: str
+    batch_id: str
+    fees: float
+    fees_paid: float
+    fees_pending: float
+    placed: bool
+    linkedin: Optional[str] = None
+    github: Optional[str] = None
+    resume: Optional[str] = None
+
+
+class StudentUpdate(BaseModel):
+    name: Optional[str] = None
+    email: Optional[EmailStr] = None
+    contact: Optional[str] = None
+    degree: Optional[str] = None
+    specialization: Optional[str] = None
+    batch_id: Optional[str] = None
+    fees: Optional[float] = None
+    fees_paid: Optional[float] = None
+    fees_pending: Optional[float] = None
+    placed: Optional[bool] = None
+    linkedin: Optional[str] = None
+    github: Optional[str] = None
+    resume: Optional[str] = None
+
+
+# -------------------------
+# Batches
+# -------------------------
+
+class BatchCreate(BaseModel):
+    batch_id: str   # 🔥 allow B999 style IDs
+    start_date: str
+    end_date: str
+    meeting_link: Optional[str] = None
+    fees: float
+    total_students: int
+
+
+class BatchUpdate(BaseModel):
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    meeting_link: Optional[str] = None
+    fees: Optional[float] = None
+    total_students: Optional[int] = None
+
+
+# -------------------------
+# Assignments
+# -------------------------
+
+class AssignmentCreate(BaseModel):
+    registration_id: int
+    student_name: str
+    assignment_title: str
+    assignment_no: int
+    assigned_date: str
+    due_date: str
+    submission_link: Optional[str] = None
+    status: Optional[str] = "Pending"
+    marks: Optional[float] = None
+
+
+class AssignmentUpdate(BaseModel):
+    student_name: Optional[str] = None
+    assignment_title: Optional[str] = None
+    assigned_date: Optional[str] = None
+    due_date: Optional[str] = None
+    submission_link: Optional[str] = None
+    status: Optional[str] = None
+    marks: Optional[float] = None
+
+
+# -------------------------
+# Coding contests
+# -------------------------
+
+class ContestCreate(BaseModel):
+    contest_id: int
+    registration_id: int
+    batch_id: int
+    contest_name: str
+    date: str
+    score: Optional[float] = None
+    rank: Optional[str] = None
+    remark: Optional[str] = None
+
+
+class ContestUpdate(BaseModel):
+    batch_id: Optional[int] = None
+    contest_name: Optional[str] = None
+    date: Optional[str] = None
+    score: Optional[float] = None
+    rank: Optional[str] = None
+    remark: Optional[str] = None
+
+
+# -------------------------
+# Mock interviews
+# -------------------------
+
+class MockCreate(BaseModel):
+    mock_id: int
+    registration_id: int
+    batch_id: int
+    interviewer: str
+    score: Optional[float] = None
+    feedback: Optional[str] = None
+    status: Optional[str] = "Pending"
+
+
+class MockUpdate(BaseModel):
+    batch_id: Optional[int] = None
+    interviewer: Optional[str] = None
+    score: Optional[float] = None
+    feedback: Optional[str] = None
+    status: Optional[str] = None
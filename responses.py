@@ -0,0 +1,104 @@
+import os
+import threading
+from collections import OrderedDict
+
+import orjson
+from fastapi import Response
+
+from compression import COMPRESS_MIN_SIZE, accepted_encoding, compress
+
+# -------------------------
+# Settings
+# -------------------------
+# Megabytes of encoded and compressed list responses kept in memory (0 = no cache)
+RESPONSE_CACHE_MB = float(os.environ.get("RESPONSE_CACHE_MB", "64"))
+
+
+def encode(content):
+    """JSON bytes of plain dicts, lists, strings and numbers, without FastAPI's encoder pass"""
+    return orjson.dumps(content)
+
+
+def json_response(body, headers=None):
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# -------------------------
+# Encoded response cache
+# -------------------------
+
+class ResponseCache:
+    """
+    Encoded response bodies by (ETag, content encoding), least recently
+    used dropped first.
+
+    List ETags are built from the tab's version and the URL, so an entry
+    is never stale: a write moves the version and later requests simply
+    look up another key.
+    """
+
+    def __init__(self, max_bytes=RESPONSE_CACHE_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """(body, headers) stored under `key`, or None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, body, headers):
+        if len(body) > self.max_bytes:
+            return
+
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[0])
+
+            self.entries[key] = (body, headers)
+            self.size += len(body)
+
+            while self.size > self.max_bytes:
+                _, (dropped, _) = self.entries.popitem(last=False)
+                self.size -= len(dropped)
+
+
+response_cache = ResponseCache()
+
+
+async def cached_json(request, etag, build):
+    """
+    JSON response for `etag`, encoded and compressed at most once.
+
+    `build()` is awaited only on a miss and returns the content and any
+    extra headers. The plain body and each compressed form are cached
+    apart, so a client asking for another encoding reuses the encoding
+    work and only pays for the compression.
+    """
+    encoding = accepted_encoding(request)
+
+    if encoding is not None:
+        cached = response_cache.get((etag, encoding))
+        if cached:
+            return json_response(*cached)
+
+    plain = response_cache.get((etag, None))
+    if plain is None:
+        content, headers = await build()
+        plain = (encode(content), {"ETag": etag, **headers})
+        response_cache.put((etag, None), *plain)
+
+    body, headers = plain
+    if encoding is None or len(body) < COMPRESS_MIN_SIZE:
+        return json_response(body, headers)
+
+    body = compress(body, encoding)
+    headers = {**headers, "Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+    response_cache.put((etag, encoding), body, headers)
+
+    return json_response(body, headers)
@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from typing import Optional
-from sheets import assignment_ws
+from sheets import TABLES, assignment_ws
+from models import AssignmentCreate, AssignmentUpdate
+from bulk import bulk_payload, bulk_insert
+from listing import list_records
+from export import EXPORT_FORMATS, export_response
+from etags import if_match_header, not_modified, row_etag
 
 router = APIRouter()
 
@@ -9,70 +13,25 @@ router = APIRouter()
 # Fixed Headers (STRICT)
 # =========================
 
-HEADERS = [
-    "registration_id",
-    "student_name",
-    "assignment_title",
-    "assignment_no",
-    "assigned_date",
-    "due_date",
-    "submission_link",
-    "status",
-    "marks",
-]
+# Column order lives in sheets.TABLES, shared with the storage backends
+HEADERS = TABLES["assignment"]["headers"]
 
 # =========================
 # Helpers
 # =========================
 
-def normalize_row(row):
-    row = row + [""] * (len(HEADERS) - len(row))
-    return dict(zip(HEADERS, row))
+def normalize_row(record):
+    """Response body of a typed record"""
+    return record._asdict()
 
 
-def find_assignment_row(registration_id: int, assignment_no: int):
-    rows = assignment_ws.get_all_values()
-
-    for i, row in enumerate(rows[1:], start=2):
-        if not row:
-            continue
-
-        try:
-            if (
-                row[0].strip() == str(registration_id)
-                and row[3].strip() == str(assignment_no)
-            ):
-                return i, normalize_row(row)
-        except IndexError:
-            continue
-
-    return None, None
-
-
-# =========================
-# Models
-# =========================
-
-class AssignmentCreate(BaseModel):
-    registration_id: int
-    student_name: str
-    assignment_title: str
-    assignment_no: int
-    assigned_date: str
-    due_date: str
-    submission_link: Optional[str] = None
-    status: Optional[str] = "Pending"
-    marks: Optional[float] = None
+async def find_assignment_row(registration_id: int, assignment_no: int):
+    row_number, row = await assignment_ws.afind(registration_id, assignment_no)
 
+    if not row_number:
+        return None, None
 
-class AssignmentUpdate(BaseModel):
-    student_name: Optional[str] = None
-    assignment_title: Optional[str] = None
-    assigned_date: Optional[str] = None
-    due_date: Optional[str] = None
-    submission_link: Optional[str] = None
-    status: Optional[str] = None
-    marks: Optional[float] = None
+    return row_number, normalize_row(assignment_ws.record(row_number, row))
 
 
 # =========================
@@ -80,9 +39,9 @@ class AssignmentUpdate(BaseModel):
 # =========================
 
 @router.post("/")
-def create_assignment(assignment: AssignmentCreate):
+async def create_assignment(assignment: AssignmentCreate):
 
-    row_number, _ = find_assignment_row(
+    row_number, _ = await find_assignment_row(
         assignment.registration_id,
         assignment.assignment_no,
     )
@@ -93,26 +52,55 @@ def create_assignment(assignment: AssignmentCreate):
     data = assignment.model_dump()
     row = [data.get(col, "") for col in HEADERS]
 
-    assignment_ws.append_row(row)
+    await assignment_ws.aappend_row(row)
 
     return {"message": "Assignment added successfully"}
 
 
+# =========================
+# BULK CREATE
+# =========================
+
+@router.post("/bulk")
+async def bulk_create_assignments(items: list = Depends(bulk_payload)):
+    return await bulk_insert(
+        assignment_ws,
+        AssignmentCreate,
+        items,
+        HEADERS,
+        key=["registration_id", "assignment_no"],
+    )
+
+
 # =========================
 # READ ALL
 # =========================
 
 @router.get("/")
-def get_all_assignments():
-
-    rows = assignment_ws.get_all_values()
+async def get_all_assignments(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    return await list_records(
+        assignment_ws,
+        request,
+        HEADERS,
+        normalize_row,
+        limit=limit,
+        cursor=cursor,
+        fields=fields,
+    )
 
-    assignments = []
 
-    for row in rows[1:]:
-        assignments.append(normalize_row(row))
+# =========================
+# EXPORT
+# =========================
 
-    return assignments
+@router.get("/export")
+async def export_assignments(format: str = Query("ndjson", pattern=EXPORT_FORMATS)):
+    return export_response(assignment_ws, HEADERS, normalize_row, format, "assignments")
 
 
 # =========================
@@ -120,17 +108,24 @@ def get_all_assignments():
 # =========================
 
 @router.get("/{registration_id}/{assignment_no}")
-def get_assignment(registration_id: int, assignment_no: int):
-
-    _, assignment = find_assignment_row(
-        registration_id,
-        assignment_no,
-    )
+async def get_assignment(
+    registration_id: int,
+    assignment_no: int,
+    request: Request,
+    response: Response,
+):
+    row_number, row = await assignment_ws.afind(registration_id, assignment_no)
 
-    if not assignment:
+    if not row:
         raise HTTPException(404, "Assignment not found")
 
-    return assignment
+    etag = assignment_ws.etag(row_number, row)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    response.headers["ETag"] = etag
+    return normalize_row(assignment_ws.record(row_number, row))
 
 
 # =========================
@@ -138,13 +133,15 @@ def get_assignment(registration_id: int, assignment_no: int):
 # =========================
 
 @router.patch("/{registration_id}/{assignment_no}")
-def update_assignment(
+async def update_assignment(
     registration_id: int,
     assignment_no: int,
     updated: AssignmentUpdate,
+    response: Response,
+    if_match: Optional[str] = Depends(if_match_header),
 ):
 
-    row_number, _ = find_assignment_row(
+    row_number, _ = await find_assignment_row(
         registration_id,
         assignment_no,
     )
@@ -157,10 +154,13 @@ def update_assignment(
     if not update_data:
         raise HTTPException(400, "No fields to update")
 
-    for col, value in update_data.items():
-        if col in HEADERS:
-            col_index = HEADERS.index(col) + 1
-            assignment_ws.update_cell(row_number, col_index, value)
+    changes = {
+        HEADERS.index(col) + 1: value
+        for col, value in update_data.items()
+        if col in HEADERS
+    }
+    cells = await assignment_ws.aupdate_record([registration_id, assignment_no], changes, if_match)
+    response.headers["ETag"] = row_etag(cells)
 
     return {"message": "Assignment updated successfully"}
 
@@ -170,9 +170,13 @@ def update_assignment(
 # =========================
 
 @router.delete("/{registration_id}/{assignment_no}")
-def delete_assignment(registration_id: int, assignment_no: int):
+async def delete_assignment(
+    registration_id: int,
+    assignment_no: int,
+    if_match: Optional[str] = Depends(if_match_header),
+):
 
-    row_number, _ = find_assignment_row(
+    row_number, _ = await find_assignment_row(
         registration_id,
         assignment_no,
     )
@@ -180,6 +184,6 @@ def delete_assignment(registration_id: int, assignment_no: int):
     if not row_number:
         raise HTTPException(404, "Assignment not found")
 
-    assignment_ws.delete_rows(row_number)
+    await assignment_ws.adelete_record([registration_id, assignment_no], if_match)
 
     return {"message": "Assignment deleted successfully"}
\ No newline at end of file
@@ -1,7 +1,14 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from typing import Optional
-from sheets import batches_ws
+from sheets import TABLES, batches_ws
+from models import BatchCreate, BatchUpdate
+from listing import list_records
+from export import EXPORT_FORMATS, export_response
+from etags import if_match_header, not_modified, row_etag
+from leaderboards import batch_leaderboards, batch_entry, leaderboard_page
+from summaries import batch_summary
 
 router = APIRouter()
 
@@ -9,56 +16,25 @@ router = APIRouter()
 # Fixed headers
 # =========================
 
-HEADERS = [
-    "batch_id",
-    "start_date",
-    "end_date",
-    "meeting_link",
-    "fees",
-    "total_students",
-]
+# Column order lives in sheets.TABLES, shared with the storage backends
+HEADERS = TABLES["batches"]["headers"]
 
 # =========================
 # Helpers
 # =========================
 
-def normalize_row(row):
-    row = row + [""] * (len(HEADERS) - len(row))
-    return dict(zip(HEADERS, row))
-
-
-def find_batch_row(batch_id: str):
-    rows = batches_ws.get_all_values()
-
-    for i, row in enumerate(rows[1:], start=2):
-        if not row:
-            continue
+def normalize_row(record):
+    """Response body of a typed record"""
+    return record._asdict()
 
-        if row[0].strip() == str(batch_id):
-            return i, normalize_row(row)
 
-    return None, None
-
-
-# =========================
-# Models
-# =========================
-
-class BatchCreate(BaseModel):
-    batch_id: str   # 🔥 allow B999 style IDs
-    start_date: str
-    end_date: str
-    meeting_link: Optional[str] = None
-    fees: float
-    total_students: int
+async def find_batch_row(batch_id: str):
+    row_number, row = await batches_ws.afind(batch_id)
 
+    if not row_number:
+        return None, None
 
-class BatchUpdate(BaseModel):
-    start_date: Optional[str] = None
-    end_date: Optional[str] = None
-    meeting_link: Optional[str] = None
-    fees: Optional[float] = None
-    total_students: Optional[int] = None
+    return row_number, normalize_row(batches_ws.record(row_number, row))
 
 
 # =========================
@@ -66,8 +42,8 @@ class BatchUpdate(BaseModel):
 # =========================
 
 @router.post("/")
-def create_batch(batch: BatchCreate):
-    row_number, _ = find_batch_row(batch.batch_id)
+async def create_batch(batch: BatchCreate):
+    row_number, _ = await find_batch_row(batch.batch_id)
 
     if row_number:
         raise HTTPException(400, "Batch already exists")
@@ -75,7 +51,7 @@ def create_batch(batch: BatchCreate):
     data = batch.model_dump()
     row = [data.get(col, "") for col in HEADERS]
 
-    batches_ws.append_row(row)
+    await batches_ws.aappend_row(row)
 
     return {"message": "Batch added successfully"}
 
@@ -85,15 +61,68 @@ def create_batch(batch: BatchCreate):
 # =========================
 
 @router.get("/")
-def get_all_batches():
-    rows = batches_ws.get_all_values()
+async def get_all_batches(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    return await list_records(
+        batches_ws,
+        request,
+        HEADERS,
+        normalize_row,
+        limit=limit,
+        cursor=cursor,
+        fields=fields,
+    )
+
+
+# =========================
+# EXPORT
+# =========================
+
+@router.get("/export")
+async def export_batches(format: str = Query("ndjson", pattern=EXPORT_FORMATS)):
+    return export_response(batches_ws, HEADERS, normalize_row, format, "batches")
 
-    batches = []
 
-    for row in rows[1:]:
-        batches.append(normalize_row(row))
+# =========================
+# LEADERBOARD
+# =========================
+
+@router.get("/{batch_id}/leaderboard")
+async def batch_leaderboard(
+    batch_id: str,
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    registration_id: Optional[int] = None,
+):
+    state = await batch_leaderboards.afresh()
+
+    with batch_leaderboards.lock:
+        board = state["boards"].get(batch_id.strip())
 
-    return batches
+        if not board:
+            raise HTTPException(404, "No contest results for this batch")
+
+        page = leaderboard_page(board, batch_entry, offset, limit, registration_id)
+
+    return {"batch_id": batch_id, **page}
+
+
+# =========================
+# SUMMARY
+# =========================
+
+@router.get("/{batch_id}/summary")
+async def get_batch_summary(batch_id: str):
+    summary = await asyncio.to_thread(batch_summary, batch_id.strip())
+
+    if not summary:
+        raise HTTPException(404, "Batch not found")
+
+    return summary
 
 
 # =========================
@@ -101,13 +130,19 @@ def get_all_batches():
 # =========================
 
 @router.get("/{batch_id}")
-def get_batch(batch_id: str):
-    _, batch = find_batch_row(batch_id)
+async def get_batch(batch_id: str, request: Request, response: Response):
+    row_number, row = await batches_ws.afind(batch_id)
 
-    if not batch:
+    if not row:
         raise HTTPException(404, "Batch not found")
 
-    return batch
+    etag = batches_ws.etag(row_number, row)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    response.headers["ETag"] = etag
+    return normalize_row(batches_ws.record(row_number, row))
 
 
 # =========================
@@ -115,8 +150,13 @@ def get_batch(batch_id: str):
 # =========================
 
 @router.patch("/{batch_id}")
-def update_batch(batch_id: str, updated: BatchUpdate):
-    row_number, _ = find_batch_row(batch_id)
+async def update_batch(
+    batch_id: str,
+    updated: BatchUpdate,
+    response: Response,
+    if_match: Optional[str] = Depends(if_match_header),
+):
+    row_number, _ = await find_batch_row(batch_id)
 
     if not row_number:
         raise HTTPException(404, "Batch not found")
@@ -126,10 +166,13 @@ def update_batch(batch_id: str, updated: BatchUpdate):
     if not update_data:
         raise HTTPException(400, "No fields to update")
 
-    for col, value in update_data.items():
-        if col in HEADERS:
-            col_index = HEADERS.index(col) + 1
-            batches_ws.update_cell(row_number, col_index, value)
+    changes = {
+        HEADERS.index(col) + 1: value
+        for col, value in update_data.items()
+        if col in HEADERS
+    }
+    cells = await batches_ws.aupdate_record([batch_id], changes, if_match)
+    response.headers["ETag"] = row_etag(cells)
 
     return {"message": "Batch updated successfully"}
 
@@ -139,12 +182,15 @@ def update_batch(batch_id: str, updated: BatchUpdate):
 # =========================
 
 @router.delete("/{batch_id}")
-def delete_batch(batch_id: str):
-    row_number, _ = find_batch_row(batch_id)
+async def delete_batch(
+    batch_id: str,
+    if_match: Optional[str] = Depends(if_match_header),
+):
+    row_number, _ = await find_batch_row(batch_id)
 
     if not row_number:
         raise HTTPException(404, "Batch not found")
 
-    batches_ws.delete_rows(row_number)
+    await batches_ws.adelete_record([batch_id], if_match)
 
     return {"message": "Batch deleted successfully"}
\ No newline at end of file
@@ -0,0 +1,96 @@
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from changes import change_id, changelog, changes_response, parse_change_id
+
+router = APIRouter()
+
+# Seconds between keep-alive comments on an idle stream
+KEEP_ALIVE = 15
+
+
+# =========================
+# Helpers
+# =========================
+
+def sse(event, data, id=None):
+    lines = [f"id: {id}"] if id is not None else []
+    lines += [f"event: {event}", f"data: {json.dumps(data)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+# =========================
+# Change feed
+# =========================
+
+def parse_since(since):
+    try:
+        return parse_change_id(since)
+    except ValueError:
+        raise HTTPException(400, "Invalid since, expected a change id")
+
+
+@router.get("/")
+async def get_changes(
+    since: str = Query("0"),
+    limit: int = Query(500, ge=1, le=1000),
+):
+    """
+    Changes after change id `since` ("{epoch}:{seq}", or 0 for the whole
+    log); `reset` means refetch the lists
+    """
+    return changes_response(parse_since(since), limit)
+
+
+@router.get("/stream")
+async def stream_changes(
+    request: Request,
+    since: Optional[str] = Query(None),
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Server-Sent Events: one `change` event per change, `reset` when the
+    client has fallen too far behind or its id is from another epoch.
+    Reconnects resume from Last-Event-ID.
+    """
+    if last_event_id is not None:
+        try:
+            seq = parse_change_id(last_event_id)
+        except ValueError:
+            seq = None  # not one of ours: start over with a reset
+    elif since is not None:
+        seq = parse_since(since)
+    else:
+        seq = changelog.seq
+
+    async def events():
+        nonlocal seq
+
+        while not await request.is_disconnected():
+            if seq is None:
+                changes, reset = [], True
+            else:
+                changes, reset = changelog.since(seq, 500)
+
+            if reset:
+                seq = changelog.seq
+                yield sse("reset", {"last_id": change_id(seq), "last_seq": seq}, id=change_id(seq))
+                continue
+
+            for change in changes:
+                yield sse("change", change, id=change["id"])
+                seq = change["seq"]
+
+            if not changes:
+                await changelog.wait(seq, KEEP_ALIVE)
+                if changelog.seq == seq:
+                    yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
@@ -1,7 +1,12 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from typing import Optional
-from sheets import contest_ws
+from sheets import TABLES, contest_ws
+from models import ContestCreate, ContestUpdate
+from bulk import bulk_payload, bulk_insert
+from listing import list_records
+from export import EXPORT_FORMATS, export_response
+from etags import if_match_header, not_modified, row_etag
+from leaderboards import contest_leaderboards, contest_entry, leaderboard_page
 
 router = APIRouter()
 
@@ -9,67 +14,25 @@ router = APIRouter()
 # Fixed headers
 # =========================
 
-HEADERS = [
-    "contest_id",
-    "registration_id",
-    "batch_id",
-    "contest_name",
-    "date",
-    "score",
-    "rank",
-    "remark",
-]
+# Column order lives in sheets.TABLES, shared with the storage backends
+HEADERS = TABLES["contest"]["headers"]
 
 # =========================
 # Helpers
 # =========================
 
-def normalize_row(row):
-    row = row + [""] * (len(HEADERS) - len(row))
-    return dict(zip(HEADERS, row))
+def normalize_row(record):
+    """Response body of a typed record"""
+    return record._asdict()
 
 
-def find_contest_row(contest_id: int, registration_id: int):
-    rows = contest_ws.get_all_values()
-
-    for i, row in enumerate(rows[1:], start=2):
-        if not row:
-            continue
-
-        try:
-            if (
-                row[0].strip() == str(contest_id)
-                and row[1].strip() == str(registration_id)
-            ):
-                return i, normalize_row(row)
-        except IndexError:
-            continue
-
-    return None, None
-
-
-# =========================
-# Models
-# =========================
-
-class ContestCreate(BaseModel):
-    contest_id: int
-    registration_id: int
-    batch_id: int
-    contest_name: str
-    date: str
-    score: Optional[float] = None
-    rank: Optional[str] = None
-    remark: Optional[str] = None
+async def find_contest_row(contest_id: int, registration_id: int):
+    row_number, row = await contest_ws.afind(contest_id, registration_id)
 
+    if not row_number:
+        return None, None
 
-class ContestUpdate(BaseModel):
-    batch_id: Optional[int] = None
-    contest_name: Optional[str] = None
-    date: Optional[str] = None
-    score: Optional[float] = None
-    rank: Optional[str] = None
-    remark: Optional[str] = None
+    return row_number, normalize_row(contest_ws.record(row_number, row))
 
 
 # =========================
@@ -77,9 +40,9 @@ class ContestUpdate(BaseModel):
 # =========================
 
 @router.post("/")
-def create_contest(contest: ContestCreate):
+async def create_contest(contest: ContestCreate):
 
-    row_number, _ = find_contest_row(
+    row_number, _ = await find_contest_row(
         contest.contest_id,
         contest.registration_id,
     )
@@ -90,26 +53,79 @@ def create_contest(contest: ContestCreate):
     data = contest.model_dump()
     row = [data.get(col, "") for col in HEADERS]
 
-    contest_ws.append_row(row)
+    await contest_ws.aappend_row(row)
 
     return {"message": "Contest added successfully"}
 
 
+# =========================
+# BULK CREATE
+# =========================
+
+@router.post("/bulk")
+async def bulk_create_contests(items: list = Depends(bulk_payload)):
+    return await bulk_insert(
+        contest_ws,
+        ContestCreate,
+        items,
+        HEADERS,
+        key=["contest_id", "registration_id"],
+    )
+
+
 # =========================
 # READ ALL
 # =========================
 
 @router.get("/")
-def get_all_contests():
+async def get_all_contests(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    return await list_records(
+        contest_ws,
+        request,
+        HEADERS,
+        normalize_row,
+        limit=limit,
+        cursor=cursor,
+        fields=fields,
+    )
 
-    rows = contest_ws.get_all_values()
 
-    contests = []
+# =========================
+# EXPORT
+# =========================
 
-    for row in rows[1:]:
-        contests.append(normalize_row(row))
+@router.get("/export")
+async def export_contests(format: str = Query("ndjson", pattern=EXPORT_FORMATS)):
+    return export_response(contest_ws, HEADERS, normalize_row, format, "contests")
 
-    return contests
+
+# =========================
+# LEADERBOARD
+# =========================
+
+@router.get("/{contest_id}/leaderboard")
+async def contest_leaderboard(
+    contest_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    registration_id: Optional[int] = None,
+):
+    boards = await contest_leaderboards.afresh()
+
+    with contest_leaderboards.lock:
+        board = boards.get(contest_id)
+
+        if not board:
+            raise HTTPException(404, "Contest not found")
+
+        page = leaderboard_page(board, contest_entry, offset, limit, registration_id)
+
+    return {"contest_id": contest_id, **page}
 
 
 # =========================
@@ -117,14 +133,24 @@ def get_all_contests():
 # =========================
 
 @router.get("/{contest_id}/{registration_id}")
-def get_contest(contest_id: int, registration_id: int):
-
-    _, contest = find_contest_row(contest_id, registration_id)
+async def get_contest(
+    contest_id: int,
+    registration_id: int,
+    request: Request,
+    response: Response,
+):
+    row_number, row = await contest_ws.afind(contest_id, registration_id)
 
-    if not contest:
+    if not row:
         raise HTTPException(404, "Contest not found")
 
-    return contest
+    etag = contest_ws.etag(row_number, row)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    response.headers["ETag"] = etag
+    return normalize_row(contest_ws.record(row_number, row))
 
 
 # =========================
@@ -132,13 +158,15 @@ def get_contest(contest_id: int, registration_id: int):
 # =========================
 
 @router.patch("/{contest_id}/{registration_id}")
-def update_contest(
+async def update_contest(
     contest_id: int,
     registration_id: int,
     updated: ContestUpdate,
+    response: Response,
+    if_match: Optional[str] = Depends(if_match_header),
 ):
 
-    row_number, _ = find_contest_row(contest_id, registration_id)
+    row_number, _ = await find_contest_row(contest_id, registration_id)
 
     if not row_number:
         raise HTTPException(404, "Contest not found")
@@ -148,10 +176,13 @@ def update_contest(
     if not update_data:
         raise HTTPException(400, "No fields to update")
 
-    for col, value in update_data.items():
-        if col in HEADERS:
-            col_index = HEADERS.index(col) + 1
-            contest_ws.update_cell(row_number, col_index, value)
+    changes = {
+        HEADERS.index(col) + 1: value
+        for col, value in update_data.items()
+        if col in HEADERS
+    }
+    cells = await contest_ws.aupdate_record([contest_id, registration_id], changes, if_match)
+    response.headers["ETag"] = row_etag(cells)
 
     return {"message": "Contest updated successfully"}
 
@@ -161,13 +192,17 @@ def update_contest(
 # =========================
 
 @router.delete("/{contest_id}/{registration_id}")
-def delete_contest(contest_id: int, registration_id: int):
+async def delete_contest(
+    contest_id: int,
+    registration_id: int,
+    if_match: Optional[str] = Depends(if_match_header),
+):
 
-    row_number, _ = find_contest_row(contest_id, registration_id)
+    row_number, _ = await find_contest_row(contest_id, registration_id)
 
     if not row_number:
         raise HTTPException(404, "Contest not found")
 
-    contest_ws.delete_rows(row_number)
+    await contest_ws.adelete_record([contest_id, registration_id], if_match)
 
     return {"message": "Contest deleted successfully"}
\ No newline at end of file
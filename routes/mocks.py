@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from typing import Optional
-from sheets import mock_ws
+from sheets import TABLES, mock_ws
+from models import MockCreate, MockUpdate
+from bulk import bulk_payload, bulk_insert
+from listing import list_records
+from export import EXPORT_FORMATS, export_response
+from etags import if_match_header, not_modified, row_etag
 
 router = APIRouter()
 
@@ -9,64 +13,25 @@ router = APIRouter()
 # Fixed headers
 # =========================
 
-HEADERS = [
-    "mock_id",
-    "registration_id",
-    "batch_id",
-    "interviewer",
-    "score",
-    "feedback",
-    "status",
-]
+# Column order lives in sheets.TABLES, shared with the storage backends
+HEADERS = TABLES["mock"]["headers"]
 
 # =========================
 # Helpers
 # =========================
 
-def normalize_row(row):
-    row = row + [""] * (len(HEADERS) - len(row))
-    return dict(zip(HEADERS, row))
+def normalize_row(record):
+    """Response body of a typed record"""
+    return record._asdict()
 
 
-def find_mock_row(mock_id: int, registration_id: int):
-    rows = mock_ws.get_all_values()
-
-    for i, row in enumerate(rows[1:], start=2):
-        if not row:
-            continue
-
-        try:
-            if (
-                row[0].strip() == str(mock_id)
-                and row[1].strip() == str(registration_id)
-            ):
-                return i, normalize_row(row)
-        except IndexError:
-            continue
-
-    return None, None
-
-
-# =========================
-# Models
-# =========================
-
-class MockCreate(BaseModel):
-    mock_id: int
-    registration_id: int
-    batch_id: int
-    interviewer: str
-    score: Optional[float] = None
-    feedback: Optional[str] = None
-    status: Optional[str] = "Pending"
+async def find_mock_row(mock_id: int, registration_id: int):
+    row_number, row = await mock_ws.afind(mock_id, registration_id)
 
+    if not row_number:
+        return None, None
 
-class MockUpdate(BaseModel):
-    batch_id: Optional[int] = None
-    interviewer: Optional[str] = None
-    score: Optional[float] = None
-    feedback: Optional[str] = None
-    status: Optional[str] = None
+    return row_number, normalize_row(mock_ws.record(row_number, row))
 
 
 # =========================
@@ -74,9 +39,9 @@ class MockUpdate(BaseModel):
 # =========================
 
 @router.post("/")
-def create_mock(mock: MockCreate):
+async def create_mock(mock: MockCreate):
 
-    row_number, _ = find_mock_row(
+    row_number, _ = await find_mock_row(
         mock.mock_id,
         mock.registration_id,
     )
@@ -87,26 +52,55 @@ def create_mock(mock: MockCreate):
     data = mock.model_dump()
     row = [data.get(col, "") for col in HEADERS]
 
-    mock_ws.append_row(row)
+    await mock_ws.aappend_row(row)
 
     return {"message": "Mock interview added successfully"}
 
 
+# =========================
+# BULK CREATE
+# =========================
+
+@router.post("/bulk")
+async def bulk_create_mocks(items: list = Depends(bulk_payload)):
+    return await bulk_insert(
+        mock_ws,
+        MockCreate,
+        items,
+        HEADERS,
+        key=["mock_id", "registration_id"],
+    )
+
+
 # =========================
 # READ ALL
 # =========================
 
 @router.get("/")
-def get_all_mocks():
-
-    rows = mock_ws.get_all_values()
+async def get_all_mocks(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    return await list_records(
+        mock_ws,
+        request,
+        HEADERS,
+        normalize_row,
+        limit=limit,
+        cursor=cursor,
+        fields=fields,
+    )
 
-    mocks = []
 
-    for row in rows[1:]:
-        mocks.append(normalize_row(row))
+# =========================
+# EXPORT
+# =========================
 
-    return mocks
+@router.get("/export")
+async def export_mocks(format: str = Query("ndjson", pattern=EXPORT_FORMATS)):
+    return export_response(mock_ws, HEADERS, normalize_row, format, "mocks")
 
 
 # =========================
@@ -114,14 +108,24 @@ def get_all_mocks():
 # =========================
 
 @router.get("/{mock_id}/{registration_id}")
-def get_mock(mock_id: int, registration_id: int):
-
-    _, mock = find_mock_row(mock_id, registration_id)
+async def get_mock(
+    mock_id: int,
+    registration_id: int,
+    request: Request,
+    response: Response,
+):
+    row_number, row = await mock_ws.afind(mock_id, registration_id)
 
-    if not mock:
+    if not row:
         raise HTTPException(404, "Mock interview not found")
 
-    return mock
+    etag = mock_ws.etag(row_number, row)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    response.headers["ETag"] = etag
+    return normalize_row(mock_ws.record(row_number, row))
 
 
 # =========================
@@ -129,13 +133,15 @@ def get_mock(mock_id: int, registration_id: int):
 # =========================
 
 @router.patch("/{mock_id}/{registration_id}")
-def update_mock(
+async def update_mock(
     mock_id: int,
     registration_id: int,
     updated: MockUpdate,
+    response: Response,
+    if_match: Optional[str] = Depends(if_match_header),
 ):
 
-    row_number, _ = find_mock_row(mock_id, registration_id)
+    row_number, _ = await find_mock_row(mock_id, registration_id)
 
     if not row_number:
         raise HTTPException(404, "Mock interview not found")
@@ -145,10 +151,13 @@ def update_mock(
     if not update_data:
         raise HTTPException(400, "No fields to update")
 
-    for col, value in update_data.items():
-        if col in HEADERS:
-            col_index = HEADERS.index(col) + 1
-            mock_ws.update_cell(row_number, col_index, value)
+    changes = {
+        HEADERS.index(col) + 1: value
+        for col, value in update_data.items()
+        if col in HEADERS
+    }
+    cells = await mock_ws.aupdate_record([mock_id, registration_id], changes, if_match)
+    response.headers["ETag"] = row_etag(cells)
 
     return {"message": "Mock interview updated successfully"}
 
@@ -158,13 +167,17 @@ def update_mock(
 # =========================
 
 @router.delete("/{mock_id}/{registration_id}")
-def delete_mock(mock_id: int, registration_id: int):
+async def delete_mock(
+    mock_id: int,
+    registration_id: int,
+    if_match: Optional[str] = Depends(if_match_header),
+):
 
-    row_number, _ = find_mock_row(mock_id, registration_id)
+    row_number, _ = await find_mock_row(mock_id, registration_id)
 
     if not row_number:
         raise HTTPException(404, "Mock interview not found")
 
-    mock_ws.delete_rows(row_number)
+    await mock_ws.adelete_record([mock_id, registration_id], if_match)
 
     return {"message": "Mock interview deleted successfully"}
\ No newline at end of file
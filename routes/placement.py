@@ -1,5 +1,12 @@
+import asyncio
+
 from fastapi import APIRouter, HTTPException
-from sheets import assignment_ws, contest_ws, mock_ws
+from pydantic import BaseModel
+from typing import List
+from sheets import students_ws
+from analytics import areadiness
+from aggregates import aggregates
+from responses import encode, json_response
 
 router = APIRouter()
 
@@ -8,26 +15,61 @@ router = APIRouter()
 # Helper Functions
 # =========================
 
-def to_int_safe(value, default=0):
-    """Convert a value to int safely, ignoring non-digit characters"""
-    try:
-        digits = ''.join(filter(str.isdigit, str(value)))
-        return int(digits) if digits else default
-    except:
-        return default
+def cohort_response(results, not_found, **extra):
+    """One verdict per student can run to megabytes, so it is encoded with orjson"""
+    return json_response(encode({
+        **extra,
+        "total": len(results),
+        "placement_ready": sum(r["placement_ready"] == "Yes" for r in results),
+        "students": results,
+        "not_found": not_found,
+    }))
+
+
+# =========================
+# Models
+# =========================
+
+class PlacementBatchRequest(BaseModel):
+    registration_ids: List[int]
+
+
+# =========================
+# Cohort Placement Status
+# =========================
+
+@router.get("/")
+async def batch_placement_status(batch_id: str):
+    registration_ids = [
+        students_ws.record(n, row).registration_id
+        for n, row in await students_ws.afind_all("batch_id", batch_id)
+    ]
+
+    if not registration_ids:
+        raise HTTPException(status_code=404, detail="Batch has no students")
+
+    return cohort_response(*await areadiness(registration_ids), batch_id=batch_id)
+
 
+@router.post("/batch")
+async def placement_status_many(request: PlacementBatchRequest):
+    return cohort_response(*await areadiness(request.registration_ids))
 
-def get_str_safe(value):
-    """Convert a value to lowercase string safely"""
-    return str(value).strip().lower() if value else ""
 
+@router.get("/all")
+async def placement_status_all():
+    return cohort_response(*await areadiness())
+
+
+# =========================
+# Rebuild Aggregates
+# =========================
 
-def student_exists(reg_id: int) -> bool:
-    """Check if a student exists in any of the three sheets"""
-    for ws in [assignment_ws, contest_ws, mock_ws]:
-        if any(to_int_safe(s.get("registration_id")) == reg_id for s in ws.get_all_records()):
-            return True
-    return False
+@router.post("/rebuild")
+async def rebuild_aggregates():
+    """Recompute the per-student summaries, e.g. after editing the sheet by hand"""
+    await asyncio.to_thread(aggregates.rebuild)
+    return {"message": "Aggregates rebuilt", "students": len(aggregates.state)}
 
 
 # =========================
@@ -35,71 +77,10 @@ def student_exists(reg_id: int) -> bool:
 # =========================
 
 @router.get("/{registration_id}")
-def placement_status(registration_id: int):
-    if not student_exists(registration_id):
-        raise HTTPException(status_code=404, detail="Student not found")
+async def placement_status(registration_id: int):
+    summary = await aggregates.aget(registration_id)
 
-    reasons_not_ready = []
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Student not found")
 
-    # -------------------------
-    # Assignments
-    # -------------------------
-    assignments = [
-        a for a in assignment_ws.get_all_records()
-        if to_int_safe(a.get("registration_id")) == registration_id
-    ]
-    if assignments:
-        avg_marks = sum(to_int_safe(a.get("marks")) for a in assignments) / len(assignments)
-        if avg_marks < 40:
-            reasons_not_ready.append(f"Average assignment marks too low ({avg_marks:.1f})")
-    else:
-        avg_marks = 0
-        reasons_not_ready.append("No assignments submitted")
-
-    # -------------------------
-    # Coding Contests
-    # -------------------------
-    contests = [
-        c for c in contest_ws.get_all_records()
-        if to_int_safe(c.get("registration_id")) == registration_id
-    ]
-    contest_ok = any(
-        to_int_safe(c.get("score")) >= 50 and to_int_safe(c.get("rank")) <= 10
-        for c in contests
-    )
-    if not contest_ok:
-        if contests:
-            reasons_not_ready.append("Coding contest requirements not met (score >=50 and rank <=10)")
-        else:
-            reasons_not_ready.append("No coding contests participated")
-
-    # -------------------------
-    # Mock Interviews
-    # -------------------------
-    mocks = [
-        m for m in mock_ws.get_all_records()
-        if to_int_safe(m.get("registration_id")) == registration_id
-    ]
-    mock_ok = any(
-        to_int_safe(m.get("score")) >= 60 and get_str_safe(m.get("status")) == "pass"
-        for m in mocks
-    )
-    if not mock_ok:
-        if mocks:
-            reasons_not_ready.append("Mock interview requirements not met (score >=60 and status 'pass')")
-        else:
-            reasons_not_ready.append("No mock interviews conducted")
-
-    # -------------------------
-    # Final Placement Status
-    # -------------------------
-    placement_ready = avg_marks >= 40 and contest_ok and mock_ok
-
-    return {
-        "registration_id": registration_id,
-        "average_assignment_marks": avg_marks,
-        "coding_contest_pass": contest_ok,
-        "mock_interview_pass": mock_ok,
-        "placement_ready": "Yes" if placement_ready else "No",
-        "reasons_not_ready": reasons_not_ready if reasons_not_ready else ["All criteria met"]
-    }
\ No newline at end of file
+    return summary.verdict(registration_id)
@@ -1,7 +1,19 @@
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, EmailStr
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import BaseModel
 from typing import Optional
-from sheets import students_ws
+from sheets import TABLES, students_ws, batches_ws, assignment_ws, contest_ws, mock_ws
+from models import StudentCreate, StudentUpdate
+from bulk import bulk_payload, bulk_insert
+from listing import list_records
+from export import EXPORT_FORMATS, export_response
+from etags import if_match_header, not_modified, row_etag
+from aggregates import StudentSummary, aggregates
+from routes.assignments import normalize_row as to_assignment
+from routes.batches import normalize_row as to_batch
+from routes.contests import normalize_row as to_contest
+from routes.mocks import normalize_row as to_mock
 
 router = APIRouter()
 
@@ -9,94 +21,40 @@ router = APIRouter()
 # Headers (fixed structure)
 # =========================
 
-HEADERS = [
-    "registration_id",
-    "name",
-    "email",
-    "contact",
-    "degree",
-    "specialization",
-    "batch_id",
-    "fees",
-    "fees_paid",
-    "fees_pending",
-    "placed",
-    "linkedin",
-    "github",
-    "resume",
-]
+# Column order lives in sheets.TABLES, shared with the storage backends
+HEADERS = TABLES["students"]["headers"]
 
 # =========================
 # Helpers
 # =========================
 
-def to_bool(value):
-    if isinstance(value, bool):
-        return value
-
-    if not value:
-        return False
-
-    value = str(value).strip().lower()
-    return value in ["true", "yes", "1"]
-
-
-def normalize_row(row):
-    """Ensure row matches headers length"""
-    row = row + [""] * (len(HEADERS) - len(row))
-    return dict(zip(HEADERS, row))
-
+def to_student(record):
+    """Response body of a typed record"""
+    return record._asdict()
 
-def find_student_row(registration_id: int):
-    rows = students_ws.get_all_values()
 
-    for i, row in enumerate(rows[1:], start=2):
-        if not row:
-            continue
+async def find_student_row(registration_id: int):
+    row_number, row = await students_ws.afind(registration_id)
 
-        if row[0].strip() == str(registration_id):
-            student = normalize_row(row)
-            student["placed"] = to_bool(student.get("placed"))
-            return i, student
+    if not row_number:
+        return None, None
 
-    return None, None
+    return row_number, to_student(students_ws.record(row_number, row))
 
 
 # =========================
 # Models
 # =========================
 
-class StudentCreate(BaseModel):
-    registration_id: int
-    name: str
-    email: EmailStr
-    contact: str
-    degree: str
-    specialization: str
+class StudentMove(BaseModel):
     batch_id: str
-    fees: float
-    fees_paid: float
-    fees_pending: float
-    placed: bool
-    linkedin: Optional[str] = None
-    github: Optional[str] = None
-    resume: Optional[str] = None
-
-
-class StudentUpdate(BaseModel):
-    name: Optional[str] = None
-    email: Optional[EmailStr] = None
-    contact: Optional[str] = None
-    degree: Optional[str] = None
-    specialization: Optional[str] = None
-    batch_id: Optional[str] = None
-    fees: Optional[float] = None
-    fees_paid: Optional[float] = None
-    fees_pending: Optional[float] = None
-    placed: Optional[bool] = None
-    linkedin: Optional[str] = None
-    github: Optional[str] = None
-    resume: Optional[str] = None
+
+
+def student_to_row(student: StudentCreate):
+    data = student.model_dump()
+    data["placed"] = str(data["placed"]).upper()
+
+    return [data.get(col, "") for col in HEADERS]
 
 
 # =========================
@@ -104,37 +62,62 @@ class StudentUpdate(BaseModel):
 # =========================
 
 @router.post("/")
-def create_student(student: StudentCreate):
-    row_number, _ = find_student_row(student.registration_id)
+async def create_student(student: StudentCreate):
+    row_number, _ = await find_student_row(student.registration_id)
 
     if row_number:
         raise HTTPException(400, "Student already exists")
 
-    data = student.model_dump()
-    data["placed"] = str(data["placed"]).upper()
-
-    row = [data.get(col, "") for col in HEADERS]
-    students_ws.append_row(row)
+    await students_ws.aappend_row(student_to_row(student))
 
     return {"message": "Student added successfully"}
 
 
+# =========================
+# BULK CREATE
+# =========================
+
+@router.post("/bulk")
+async def bulk_create_students(items: list = Depends(bulk_payload)):
+    return await bulk_insert(
+        students_ws,
+        StudentCreate,
+        items,
+        HEADERS,
+        key=["registration_id"],
+        to_row=student_to_row,
+    )
+
+
 # =========================
 # READ ALL
 # =========================
 
 @router.get("/")
-def get_all_students():
-    rows = students_ws.get_all_values()
+async def get_all_students(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+):
+    return await list_records(
+        students_ws,
+        request,
+        HEADERS,
+        to_student,
+        limit=limit,
+        cursor=cursor,
+        fields=fields,
+    )
 
-    students = []
 
-    for row in rows[1:]:
-        student = normalize_row(row)
-        student["placed"] = to_bool(student.get("placed"))
-        students.append(student)
+# =========================
+# EXPORT
+# =========================
 
-    return students
+@router.get("/export")
+async def export_students(format: str = Query("ndjson", pattern=EXPORT_FORMATS)):
+    return export_response(students_ws, HEADERS, to_student, format, "students")
 
 
 # =========================
@@ -142,13 +125,50 @@ def get_all_students():
 # =========================
 
 @router.get("/{registration_id}")
-def get_student(registration_id: int):
-    _, student = find_student_row(registration_id)
+async def get_student(registration_id: int, request: Request, response: Response):
+    row_number, row = await students_ws.afind(registration_id)
 
-    if not student:
+    if not row:
         raise HTTPException(404, "Student not found")
 
-    return student
+    etag = students_ws.etag(row_number, row)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    response.headers["ETag"] = etag
+    return to_student(students_ws.record(row_number, row))
+
+
+# =========================
+# PROFILE
+# =========================
+
+@router.get("/{registration_id}/profile")
+async def get_student_profile(registration_id: int):
+    """The student with their batch, activity and placement verdict in one call"""
+    (row_number, row), assignments, contests, mocks, summary = await asyncio.gather(
+        students_ws.afind(registration_id),
+        assignment_ws.afind_all("registration_id", registration_id),
+        contest_ws.afind_all("registration_id", registration_id),
+        mock_ws.afind_all("registration_id", registration_id),
+        aggregates.aget(registration_id),
+    )
+
+    if not row:
+        raise HTTPException(404, "Student not found")
+
+    student = to_student(students_ws.record(row_number, row))
+    batch_row, batch = await batches_ws.afind(student["batch_id"])
+
+    return {
+        "student": student,
+        "batch": to_batch(batches_ws.record(batch_row, batch)) if batch else None,
+        "assignments": [to_assignment(assignment_ws.record(n, r)) for n, r in assignments],
+        "contests": [to_contest(contest_ws.record(n, r)) for n, r in contests],
+        "mocks": [to_mock(mock_ws.record(n, r)) for n, r in mocks],
+        "placement": (summary or StudentSummary()).verdict(registration_id),
+    }
 
 
 # =========================
@@ -156,8 +176,13 @@ def get_student(registration_id: int):
 # =========================
 
 @router.patch("/{registration_id}")
-def update_student(registration_id: int, updated: StudentUpdate):
-    row_number, _ = find_student_row(registration_id)
+async def update_student(
+    registration_id: int,
+    updated: StudentUpdate,
+    response: Response,
+    if_match: Optional[str] = Depends(if_match_header),
+):
+    row_number, _ = await find_student_row(registration_id)
 
     if not row_number:
         raise HTTPException(404, "Student not found")
@@ -170,25 +195,91 @@ def update_student(registration_id: int, updated: StudentUpdate):
     if "placed" in update_data:
         update_data["placed"] = str(update_data["placed"]).upper()
 
-    for col, value in update_data.items():
-        if col in HEADERS:
-            col_index = HEADERS.index(col) + 1
-            students_ws.update_cell(row_number, col_index, value)
+    changes = {
+        HEADERS.index(col) + 1: value
+        for col, value in update_data.items()
+        if col in HEADERS
+    }
+    cells = await students_ws.aupdate_record([registration_id], changes, if_match)
+    response.headers["ETag"] = row_etag(cells)
 
     return {"message": "Student updated successfully"}
 
 
+# =========================
+# MOVE TO ANOTHER BATCH
+# =========================
+
+@router.post("/{registration_id}/move-batch")
+async def move_student(
+    registration_id: int,
+    move: StudentMove,
+    response: Response,
+    if_match: Optional[str] = Depends(if_match_header),
+):
+    """Change the student's batch_id here and on all their contest and mock rows"""
+    batch_id = move.batch_id.strip()
+
+    (row_number, _), (_, batch) = await asyncio.gather(
+        find_student_row(registration_id),
+        batches_ws.afind(batch_id),
+    )
+
+    if not row_number:
+        raise HTTPException(404, "Student not found")
+
+    if not batch:
+        raise HTTPException(404, "Batch not found")
+
+    cells = await students_ws.aupdate_record(
+        [registration_id], {HEADERS.index("batch_id") + 1: batch_id}, if_match,
+    )
+    response.headers["ETag"] = row_etag(cells)
+
+    # One batched write per tab, rows found through the registration_id index
+    contests, mocks = await asyncio.gather(*(
+        ws.aupdate_all(
+            "registration_id",
+            registration_id,
+            {TABLES[tab]["headers"].index("batch_id") + 1: batch_id},
+        )
+        for tab, ws in (("contest", contest_ws), ("mock", mock_ws))
+    ))
+
+    return {
+        "message": "Student moved successfully",
+        "updated": {"contests": contests, "mocks": mocks},
+    }
+
+
 # =========================
 # DELETE
 # =========================
 
 @router.delete("/{registration_id}")
-def delete_student(registration_id: int):
-    row_number, _ = find_student_row(registration_id)
+async def delete_student(
+    registration_id: int,
+    cascade: bool = False,
+    if_match: Optional[str] = Depends(if_match_header),
+):
+    row_number, _ = await find_student_row(registration_id)
 
     if not row_number:
         raise HTTPException(404, "Student not found")
 
-    students_ws.delete_rows(row_number)
+    await students_ws.adelete_record([registration_id], if_match)
+
+    if not cascade:
+        return {"message": "Student deleted successfully"}
+
+    # One batched delete per tab; the placement aggregates drop the rows'
+    # marks as they go
+    assignments, contests, mocks = await asyncio.gather(*(
+        ws.adelete_all("registration_id", registration_id)
+        for ws in (assignment_ws, contest_ws, mock_ws)
+    ))
 
-    return {"message": "Student deleted successfully"}
\ No newline at end of file
+    return {
+        "message": "Student deleted successfully",
+        "deleted": {"assignments": assignments, "contests": contests, "mocks": mocks},
+    }
\ No newline at end of file
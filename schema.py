@@ -0,0 +1,85 @@
+import math
+import typing
+from collections import namedtuple
+
+# -------------------------
+# Cell parsers
+# -------------------------
+# Sheets hands every cell back as a string. Each column is parsed once,
+# when its row is loaded or written, into the type its Create model gives
+# it. A blank or unreadable number becomes None.
+
+def parse_float(value):
+    try:
+        number = float(value.strip().replace(",", ""))
+    except ValueError:
+        return None
+    return number if math.isfinite(number) else None
+
+
+def parse_int(value):
+    """Whole number from a cell; a fractional one stays a float rather than losing digits"""
+    number = parse_float(value)
+    if number is None:
+        return None
+    return int(number) if number.is_integer() else number
+
+
+def parse_bool(value):
+    return value.strip().lower() in ["true", "yes", "1"]
+
+
+def parse_str(value):
+    return value
+
+
+PARSERS = {
+    int: parse_int,
+    float: parse_float,
+    bool: parse_bool,
+}
+
+
+def field_type(annotation):
+    """The type inside Optional[...]"""
+    args = [a for a in typing.get_args(annotation) if a is not type(None)]
+    if typing.get_origin(annotation) is typing.Union and len(args) == 1:
+        return args[0]
+    return annotation
+
+
+# -------------------------
+# Schema
+# -------------------------
+
+class Schema:
+    """
+    Column types of one tab and the record class its rows are parsed into.
+
+    Records are namedtuples, one field per header, so they are as compact
+    as a tuple and still read as `record.marks`. Types come from `model`
+    (the tab's Create model); `types` overrides single columns.
+    """
+
+    def __init__(self, model, headers, types=None):
+        types = {
+            **{name: field_type(f.annotation) for name, f in model.model_fields.items()},
+            **(types or {}),
+        }
+
+        self.headers = list(headers)
+        self.record = namedtuple(model.__name__.removesuffix("Create"), self.headers)
+        self.parsers = [PARSERS.get(types.get(h), parse_str) for h in self.headers]
+        self._parser = dict(zip(self.headers, self.parsers))
+        self._blank = [""] * len(self.headers)
+
+    def parse_value(self, column, value):
+        """One value parsed like a cell of `column`; text is stripped"""
+        parse = self._parser[column]
+        return value.strip() if parse is parse_str else parse(value)
+
+    def parse(self, cells):
+        if len(cells) < len(self.headers):
+            cells = list(cells) + self._blank[len(cells):]
+
+        return self.record._make([parse(cell) for parse, cell in zip(self.parsers, cells)])
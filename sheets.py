@@ -1,8 +1,29 @@
 import os
 import json
+import logging
+import threading
 import gspread
 from google.oauth2.service_account import Credentials
 
+from cache import CachedWorksheet
+from models import AssignmentCreate, BatchCreate, ContestCreate, MockCreate, StudentCreate
+from schema import Schema
+from sqlite_store import SqliteTable, connect
+from storage import StorageUnavailable
+
+logger = logging.getLogger(__name__)
+
+# -------------------------
+# Backend: "sheets" (Google Sheets) or "sqlite" (local file)
+# -------------------------
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "sheets")
+
+# Load every tab in the background when the app starts
+WARM_UP = os.environ.get("SHEETS_WARM_UP", "true").lower() in ["true", "yes", "1"]
+
+# Seconds between background passes removing soft-deleted rows (0 = never)
+COMPACT_INTERVAL = float(os.environ.get("SHEETS_COMPACT_INTERVAL", "300"))
+
 # -------------------------
 # Scope
 # -------------------------
@@ -12,24 +33,173 @@ scope = [
 ]
 
 # -------------------------
-# Load credentials from environment variable
+# Tables
 # -------------------------
-service_account_info = json.loads(os.environ["SERVICE_ACCOUNT_JSON"])
+# Worksheet title, columns, the key each router looks records up by, the
+# extra columns other lookups filter on, and the model records are typed
+# by. `headers` is the one list of columns: routers build rows in this
+# order, the sheet backend reads positions from the header row and SQLite
+# creates its tables from it.
+TABLES = {
+    "students": {
+        "title": "students",
+        "headers": [
+            "registration_id", "name", "email", "contact", "degree",
+            "specialization", "batch_id", "fees", "fees_paid",
+            "fees_pending", "placed", "linkedin", "github", "resume",
+        ],
+        "key": ["registration_id"],
+        "indexes": ["batch_id"],
+        "model": StudentCreate,
+    },
+    "batches": {
+        "title": "batches",
+        "headers": [
+            "batch_id", "start_date", "end_date", "meeting_link", "fees",
+            "total_students",
+        ],
+        "key": ["batch_id"],
+        "indexes": [],
+        "model": BatchCreate,
+    },
+    "assignment": {
+        "title": "assignment",
+        "headers": [
+            "registration_id", "student_name", "assignment_title",
+            "assignment_no", "assigned_date", "due_date", "submission_link",
+            "status", "marks",
+        ],
+        "key": ["registration_id", "assignment_no"],
+        "indexes": ["registration_id"],
+        "model": AssignmentCreate,
+    },
+    "contest": {
+        "title": "coding contest",
+        "headers": [
+            "contest_id", "registration_id", "batch_id", "contest_name",
+            "date", "score", "rank", "remark",
+        ],
+        "key": ["contest_id", "registration_id"],
+        "indexes": ["registration_id", "batch_id"],
+        "model": ContestCreate,
+        # Batch ids are text in the batches tab and move-batch writes them here
+        "types": {"batch_id": str},
+    },
+    "mock": {
+        "title": "mock interview",
+        "headers": [
+            "mock_id", "registration_id", "batch_id", "interviewer",
+            "score", "feedback", "status",
+        ],
+        "key": ["mock_id", "registration_id"],
+        "indexes": ["registration_id", "batch_id"],
+        "model": MockCreate,
+        "types": {"batch_id": str},
+    },
+}
 
-creds = Credentials.from_service_account_info(
-    service_account_info,
-    scopes=scope
-)
 
 # -------------------------
-# Connect to Google Sheets
+# Connect (lazily, on first use)
 # -------------------------
-client = gspread.authorize(creds)
+_spreadsheet = None
+_spreadsheet_lock = threading.Lock()
+
+
+def get_spreadsheet():
+    """Authorize and open the spreadsheet once, from whichever thread needs it first"""
+    global _spreadsheet
+
+    if _spreadsheet is None:
+        with _spreadsheet_lock:
+            if _spreadsheet is None:
+                service_account_info = json.loads(os.environ["SERVICE_ACCOUNT_JSON"])
+
+                creds = Credentials.from_service_account_info(
+                    service_account_info,
+                    scopes=scope
+                )
+
+                client = gspread.authorize(creds)
+
+                _spreadsheet = client.open("Project_Progress_Management")
+
+    return _spreadsheet
+
+
+def schema(spec):
+    return Schema(spec["model"], spec["headers"], spec.get("types"))
+
+
+def open_sheets_tables():
+    """Google Sheets, each tab behind an in-memory cache"""
+    return {
+        name: CachedWorksheet(
+            lambda title=spec["title"]: get_spreadsheet().worksheet(title),
+            spec["title"],
+            key=spec["key"],
+            indexes=spec["indexes"],
+            schema=schema(spec),
+        )
+        for name, spec in TABLES.items()
+    }
+
+
+def open_sqlite_tables():
+    """One local SQLite database with a table per tab"""
+    conn = connect()
+    lock = threading.RLock()
+
+    return {
+        name: SqliteTable(
+            conn,
+            spec["title"],
+            spec["headers"],
+            key=spec["key"],
+            indexes=spec["indexes"],
+            schema=schema(spec),
+            lock=lock,
+        )
+        for name, spec in TABLES.items()
+    }
+
+
+def warm_up():
+    """Load every tab now instead of on the first request that needs it"""
+    for table in tables.values():
+        try:
+            table.refresh()
+        except StorageUnavailable:
+            logger.warning("Could not warm up %s", table.title, exc_info=True)
+
+
+def compact():
+    """Remove soft-deleted rows from every tab"""
+    for table in tables.values():
+        try:
+            removed = table.compact()
+        except Exception:
+            # One tab failing must not keep the others from compacting
+            logger.warning("Could not compact %s", table.title, exc_info=True)
+            continue
+
+        if removed:
+            logger.info("Compacted %s: %d deleted rows removed", table.title, removed)
+
+
+def flush_writes(max_attempts=5):
+    """Send every queued write, e.g. before the process exits"""
+    for table in tables.values():
+        table.flush(max_attempts)
+
 
-sheet = client.open("Project_Progress_Management")
+if STORAGE_BACKEND == "sqlite":
+    tables = open_sqlite_tables()
+else:
+    tables = open_sheets_tables()
 
-students_ws = sheet.worksheet("students")
-batches_ws = sheet.worksheet("batches")
-assignment_ws = sheet.worksheet("assignment")
-contest_ws = sheet.worksheet("coding contest")
-mock_ws = sheet.worksheet("mock interview")
\ No newline at end of file
+students_ws = tables["students"]
+batches_ws = tables["batches"]
+assignment_ws = tables["assignment"]
+contest_ws = tables["contest"]
+mock_ws = tables["mock"]
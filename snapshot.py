@@ -0,0 +1,93 @@
+import logging
+import os
+import pickle
+import time
+
+from sheets import tables
+
+logger = logging.getLogger(__name__)
+
+# -------------------------
+# Settings
+# -------------------------
+# Local file holding the last saved copy of every tab (empty = off). It is
+# unpickled at startup, so it must only ever be written by this app.
+SNAPSHOT_PATH = os.environ.get("SHEETS_SNAPSHOT_PATH", "sheets_snapshot.pkl")
+
+# Seconds between saves; a save is skipped when no tab changed
+SNAPSHOT_INTERVAL = float(os.environ.get("SHEETS_SNAPSHOT_INTERVAL", "300"))
+
+FORMAT = 1
+
+_saved_versions = {}
+
+
+# -------------------------
+# Save / restore
+# -------------------------
+
+def save(path=SNAPSHOT_PATH):
+    """Write every loaded tab to `path`; returns how many tabs were saved"""
+    if not path:
+        return 0
+
+    versions = {name: table.version for name, table in tables.items()}
+    if versions == _saved_versions:
+        return 0
+
+    states = {}
+    for name, table in tables.items():
+        data = table.snapshot()
+        if data is not None:
+            states[name] = data
+
+    if not states:
+        return 0
+
+    # Written aside and renamed, so a crash never leaves half a file; the
+    # temp name is per process, as every worker saves to the same path
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump(
+            {"format": FORMAT, "saved_at": time.time(), "tables": states},
+            f,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+    os.replace(tmp, path)
+
+    _saved_versions.clear()
+    _saved_versions.update(versions)
+    return len(states)
+
+
+def restore(path=SNAPSHOT_PATH):
+    """
+    Load the tabs saved in `path`, if any; returns how many were restored.
+
+    Restored tabs serve reads straight away. The startup warm-up then
+    reloads them from Google, which keeps their version when nothing
+    changed in the meantime.
+    """
+    if not path or not os.path.exists(path):
+        return 0
+
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+
+        if snapshot.get("format") != FORMAT:
+            logger.info("Ignoring snapshot %s in an old format", path)
+            return 0
+
+        restored = sum(
+            tables[name].restore(data)
+            for name, data in snapshot["tables"].items()
+            if name in tables
+        )
+    except Exception:
+        logger.warning("Could not restore snapshot %s", path, exc_info=True)
+        return 0
+
+    age = time.time() - snapshot["saved_at"]
+    logger.info("Restored %d tabs from %s, saved %.0fs ago", restored, path, age)
+    return restored
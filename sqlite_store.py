@@ -0,0 +1,286 @@
+import os
+import re
+import sqlite3
+import threading
+
+from etags import etag_matches, row_etag
+from indexes import make_key
+from storage import PreconditionFailed, RecordNotFound, Table, to_cell
+
+# -------------------------
+# Settings
+# -------------------------
+SQLITE_PATH = os.environ.get("SQLITE_PATH", "progress.db")
+
+
+def connect(path=SQLITE_PATH):
+    conn = sqlite3.connect(path, check_same_thread=False)
+
+    if path != ":memory:":
+        conn.execute("PRAGMA journal_mode=WAL")
+
+    return conn
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+# -------------------------
+# SQLite table
+# -------------------------
+
+class SqliteTable(Table):
+    """
+    One tab stored as a SQLite table.
+
+    Columns are the tab's headers, stored as text just like Sheets returns
+    them. `key` becomes the primary key and every column in `indexes` gets
+    its own index. Row numbers are SQLite rowids, so they never shift when
+    other rows are deleted.
+    """
+
+    def __init__(self, conn, title, headers, key, indexes=(), schema=None, lock=None):
+        self.conn = conn
+        self.title = title
+        self.schema = schema
+        self.headers = list(headers)
+        self.key_columns = list(key)
+        self.indexed_columns = set(indexes)
+        self.name = re.sub(r"\W+", "_", title)
+        self._lock = lock or threading.RLock()
+        self._writes = 0
+        self._columns = ", ".join(quote(h) for h in self.headers)
+        self._create(indexes)
+
+    def _create(self, indexes):
+        table = quote(self.name)
+        columns = ", ".join(f"{quote(h)} TEXT NOT NULL DEFAULT ''" for h in self.headers)
+        key = ", ".join(quote(k) for k in self.key_columns)
+
+        with self._lock, self.conn:
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ({columns}, PRIMARY KEY ({key}))"
+            )
+            for column in indexes:
+                self.conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {quote(self.name + '_' + column)} "
+                    f"ON {table} ({quote(column)})"
+                )
+
+    @property
+    def version(self):
+        # data_version moves when another connection commits to the file
+        return (self._writes, self._query("PRAGMA data_version")[0][0])
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def _to_row(self, values):
+        cells = [to_cell(v) for v in values][:len(self.headers)]
+        cells += [""] * (len(self.headers) - len(cells))
+
+        # Keys are compared stripped, the same way the sheet lookups do
+        for k in self.key_columns:
+            i = self.headers.index(k)
+            cells[i] = cells[i].strip()
+
+        return cells
+
+    # ---------- reads ----------
+
+    def get_all_values(self):
+        rows = self._query(
+            f"SELECT {self._columns} FROM {quote(self.name)} ORDER BY rowid"
+        )
+        return [list(self.headers)] + [list(r) for r in rows]
+
+    def get_all_records(self):
+        return [dict(zip(self.headers, row)) for row in self.get_all_values()[1:]]
+
+    def get_all_rows(self):
+        rows = self._query(
+            f"SELECT rowid, {self._columns} FROM {quote(self.name)} ORDER BY rowid"
+        )
+        return [(r[0], list(r[1:])) for r in rows]
+
+    def iter_rows(self, chunk_size=1000):
+        # Keyset paging, so the connection lock is only held per chunk
+        after = 0
+        while True:
+            rows = self._query(
+                f"SELECT rowid, {self._columns} FROM {quote(self.name)} "
+                f"WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (after, chunk_size),
+            )
+            if not rows:
+                return
+
+            yield [(r[0], list(r[1:])) for r in rows]
+            after = rows[-1][0]
+
+    def has_index(self, column):
+        return column in self.indexed_columns
+
+    def find(self, *key):
+        where = " AND ".join(f"{quote(k)} = ?" for k in self.key_columns)
+        rows = self._query(
+            f"SELECT rowid, {self._columns} FROM {quote(self.name)} WHERE {where}",
+            make_key(key),
+        )
+
+        if not rows:
+            return None, None
+
+        return rows[0][0], list(rows[0][1:])
+
+    def find_all(self, column, value):
+        rows = self._query(
+            f"SELECT rowid, {self._columns} FROM {quote(self.name)} "
+            f"WHERE {quote(column)} = ? ORDER BY rowid",
+            make_key([value]),
+        )
+        return [(r[0], list(r[1:])) for r in rows]
+
+    # ---------- writes ----------
+
+    def append_row(self, values, **kwargs):
+        self.append_rows([values])
+
+    def append_rows(self, values, **kwargs):
+        placeholders = ", ".join("?" for _ in self.headers)
+        rows = [self._to_row(v) for v in values]
+
+        with self._lock, self.conn:
+            version = self.version
+            self._writes += 1
+            self.conn.executemany(
+                f"INSERT INTO {quote(self.name)} ({self._columns}) VALUES ({placeholders})",
+                rows,
+            )
+            self._notify(version, [], rows)
+
+    def update_cell(self, row, col, value):
+        self.update_row(row, {col: value})
+
+    def update_row(self, row, changes):
+        if not changes:
+            return
+
+        assignments = ", ".join(f"{quote(self.headers[col - 1])} = ?" for col in changes)
+
+        with self._lock, self.conn:
+            version = self.version
+            old = self._rows_between(row, row)
+            self._writes += 1
+            self.conn.execute(
+                f"UPDATE {quote(self.name)} SET {assignments} WHERE rowid = ?",
+                [to_cell(v) for v in changes.values()] + [row],
+            )
+
+            if old:
+                cells = list(old[0])
+                for col, value in changes.items():
+                    cells[col - 1] = to_cell(value)
+                self._notify(version, old, [cells])
+
+    def delete_rows(self, start_index, end_index=None):
+        end_index = end_index or start_index
+
+        with self._lock, self.conn:
+            version = self.version
+            removed = self._rows_between(start_index, end_index)
+            self._writes += 1
+            self.conn.execute(
+                f"DELETE FROM {quote(self.name)} WHERE rowid BETWEEN ? AND ?",
+                (start_index, end_index),
+            )
+            self._notify(version, removed, [])
+
+    # ---------- checked writes ----------
+    # BEGIN IMMEDIATE takes SQLite's write lock before the row is looked
+    # up, so no other connection or process can change it in between.
+
+    def _locate(self, key, etag):
+        row, cells = self.find(*key)
+
+        if row is None:
+            raise RecordNotFound(f"Record not found in '{self.title}'")
+
+        if not etag_matches(etag, row_etag(cells)):
+            raise PreconditionFailed(f"Record in '{self.title}' has changed")
+
+        return row
+
+    def update_record(self, key, changes, etag=None):
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            row = self._locate(key, etag)
+            self.update_row(row, changes)
+            return self._rows_between(row, row)[0]
+
+    def delete_record(self, key, etag=None):
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.delete_rows(self._locate(key, etag))
+
+    # ---------- writes by secondary index ----------
+
+    def update_all(self, column, value, changes):
+        if not changes:
+            return 0
+
+        assignments = ", ".join(f"{quote(self.headers[col - 1])} = ?" for col in changes)
+        where = f"{quote(column)} = ?"
+
+        with self._lock, self.conn:
+            version = self.version
+            old = self._rows_where(where, make_key([value]))
+            if not old:
+                return 0
+
+            self._writes += 1
+            self.conn.execute(
+                f"UPDATE {quote(self.name)} SET {assignments} WHERE {where}",
+                [to_cell(v) for v in changes.values()] + list(make_key([value])),
+            )
+
+            new = []
+            for cells in old:
+                cells = list(cells)
+                for col, v in changes.items():
+                    cells[col - 1] = to_cell(v)
+                new.append(cells)
+
+            self._notify(version, old, new)
+            return len(old)
+
+    def delete_all(self, column, value):
+        where = f"{quote(column)} = ?"
+
+        with self._lock, self.conn:
+            version = self.version
+            removed = self._rows_where(where, make_key([value]))
+            if not removed:
+                return 0
+
+            self._writes += 1
+            self.conn.execute(f"DELETE FROM {quote(self.name)} WHERE {where}", make_key([value]))
+            self._notify(version, removed, [])
+            return len(removed)
+
+    def _rows_where(self, where, params):
+        rows = self.conn.execute(
+            f"SELECT {self._columns} FROM {quote(self.name)} WHERE {where} ORDER BY rowid",
+            params,
+        ).fetchall()
+        return [list(r) for r in rows]
+
+    def _rows_between(self, start, end):
+        rows = self.conn.execute(
+            f"SELECT {self._columns} FROM {quote(self.name)} "
+            f"WHERE rowid BETWEEN ? AND ? ORDER BY rowid",
+            (start, end),
+        ).fetchall()
+        return [list(r) for r in rows]
@@ -0,0 +1,240 @@
+import asyncio
+
+from etags import row_etag
+
+
+def to_cell(value):
+    """Render a value the way Sheets hands it back from get_all_values"""
+    if value is None:
+        return ""
+
+    if isinstance(value, bool):
+        return str(value).upper()
+
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+
+    return str(value)
+
+
+class StorageUnavailable(Exception):
+    """The backing store could not be reached; answered with a 503"""
+
+
+class RecordNotFound(Exception):
+    """The record was gone by the time it was written; answered with a 404"""
+
+
+class PreconditionFailed(Exception):
+    """The record no longer matches the caller's If-Match; answered with a 412"""
+
+
+# -------------------------
+# Table interface
+# -------------------------
+
+class Table:
+    """
+    What every storage backend offers the routers.
+
+    The API follows gspread's worksheet so either backend can stand in for
+    a worksheet. Values come back as strings like Sheets returns them, and
+    a "row number" is an opaque handle from find()/find_all() that is
+    passed back to update_row() and delete_rows().
+
+    Backends implement the sync methods; the async ones wrap them.
+
+    `schema` parses rows into typed records; record() and records() hand
+    them out.
+    """
+
+    title = None
+    schema = None
+
+    # Bumped whenever the table's contents may have changed, so derived
+    # data (column arrays, aggregates, encoded responses) knows to rebuild
+    version = 0
+
+    _listeners = ()
+
+    def subscribe(self, listener):
+        """
+        Register listener(table, version_before, removed, added).
+
+        It is called after every local write, while the table is still
+        locked, with the cells of the rows the write removed and added (an
+        update is one of each). Reloads and writes made elsewhere are not
+        reported; they only show up as a version change.
+        """
+        self._listeners = [*self._listeners, listener]
+
+    def _notify(self, version_before, removed, added):
+        for listener in self._listeners:
+            listener(self, version_before, removed, added)
+
+    # ---------- sync ----------
+
+    def refresh(self):
+        pass
+
+    def invalidate(self):
+        pass
+
+    def compact(self):
+        """Remove soft-deleted rows for good; backends that delete in place have none"""
+        return 0
+
+    def snapshot(self):
+        """Serialised local copy for a warm restart; None for backends that keep none"""
+        return None
+
+    def restore(self, data):
+        return False
+
+    def flush(self, max_attempts=None):
+        """Send writes that are still queued; a no-op for backends without a queue"""
+        pass
+
+    def get_all_values(self):
+        raise NotImplementedError
+
+    def get_all_records(self):
+        raise NotImplementedError
+
+    def get_all_rows(self):
+        raise NotImplementedError
+
+    def iter_rows(self, chunk_size=1000):
+        """(row number, cells) of every record, yielded in chunks"""
+        rows = self.get_all_rows()
+        for i in range(0, len(rows), chunk_size):
+            yield rows[i:i + chunk_size]
+
+    def fresh_version(self):
+        """`version` once the table reflects the backing store, for conditional GETs"""
+        return self.version
+
+    def etag(self, row_number, cells):
+        """ETag of the record at `row_number` holding `cells`"""
+        return row_etag(cells)
+
+    def record(self, row_number, cells):
+        """Typed record of a row returned by find(), find_all() or get_all_rows()"""
+        return self.schema.parse(cells)
+
+    def records(self):
+        """(row number, typed record) of every record, in sheet order"""
+        return [(n, self.schema.parse(cells)) for n, cells in self.get_all_rows()]
+
+    def versioned_records(self, attempts=3):
+        """
+        (version, records()), the version being the one the records were
+        read at; None when writes kept moving it
+        """
+        for _ in range(attempts):
+            version = self.fresh_version()
+            records = self.records()
+            if self.version == version:
+                return version, records
+
+        return None, records
+
+    def has_index(self, column):
+        return False
+
+    def find(self, *key):
+        raise NotImplementedError
+
+    def find_all(self, column, value):
+        raise NotImplementedError
+
+    def append_row(self, values, **kwargs):
+        raise NotImplementedError
+
+    def append_rows(self, values, **kwargs):
+        raise NotImplementedError
+
+    def update_cell(self, row, col, value):
+        raise NotImplementedError
+
+    def update_row(self, row, changes):
+        raise NotImplementedError
+
+    def delete_rows(self, start_index, end_index=None):
+        raise NotImplementedError
+
+    def update_record(self, key, changes, etag=None):
+        """
+        update_row() on the record with this primary key.
+
+        The row is looked up again right before the write, under the
+        table's write lock, and the write only goes ahead if it still holds
+        the key and, when `etag` (an If-Match value) is given, the same
+        content. Returns the record's new cells.
+        """
+        raise NotImplementedError
+
+    def delete_record(self, key, etag=None):
+        """delete_rows() on the record with this primary key, checked like update_record()"""
+        raise NotImplementedError
+
+    def update_all(self, column, value, changes):
+        """
+        Write `changes` to every record whose `column` equals value, in one
+        request; returns how many records were updated
+        """
+        raise NotImplementedError
+
+    def delete_all(self, column, value):
+        """Delete every record whose `column` equals value, in one request; returns how many"""
+        raise NotImplementedError
+
+    # ---------- async ----------
+
+    async def _read(self, method, *args):
+        return await asyncio.to_thread(method, *args)
+
+    async def aget_all_values(self):
+        return await self._read(self.get_all_values)
+
+    async def aget_all_records(self):
+        return await self._read(self.get_all_records)
+
+    async def aget_all_rows(self):
+        return await self._read(self.get_all_rows)
+
+    async def arecords(self):
+        return await self._read(self.records)
+
+    async def afresh_version(self):
+        return await self._read(self.fresh_version)
+
+    async def afind(self, *key):
+        return await self._read(self.find, *key)
+
+    async def afind_all(self, column, value):
+        return await self._read(self.find_all, column, value)
+
+    async def aappend_row(self, values, **kwargs):
+        return await asyncio.to_thread(self.append_row, values, **kwargs)
+
+    async def aappend_rows(self, values, **kwargs):
+        return await asyncio.to_thread(self.append_rows, values, **kwargs)
+
+    async def aupdate_row(self, row, changes):
+        return await asyncio.to_thread(self.update_row, row, changes)
+
+    async def adelete_rows(self, start_index, end_index=None):
+        return await asyncio.to_thread(self.delete_rows, start_index, end_index)
+
+    async def aupdate_record(self, key, changes, etag=None):
+        return await asyncio.to_thread(self.update_record, key, changes, etag)
+
+    async def adelete_record(self, key, etag=None):
+        return await asyncio.to_thread(self.delete_record, key, etag)
+
+    async def aupdate_all(self, column, value, changes):
+        return await asyncio.to_thread(self.update_all, column, value, changes)
+
+    async def adelete_all(self, column, value):
+        return await asyncio.to_thread(self.delete_all, column, value)
@@ -0,0 +1,155 @@
+import threading
+
+from sheets import (
+    students_ws,
+    batches_ws,
+    assignment_ws,
+    contest_ws,
+    mock_ws,
+)
+from analytics import (
+    assignment_columns,
+    contest_columns,
+    get_str_safe,
+    mock_columns,
+    readiness,
+)
+
+SOURCES = [students_ws, batches_ws, assignment_ws, contest_ws, mock_ws]
+
+
+def ratio(part, whole):
+    return round(part / whole, 4) if whole else None
+
+
+def is_submitted(status, submission_link):
+    """An assignment counts as submitted once it has a link or leaves 'pending'"""
+    return bool(submission_link.strip()) or get_str_safe(status) not in ("", "pending")
+
+
+# =========================
+# Computation
+# =========================
+
+def compute_summaries():
+    """Summaries for every batch, from a single pass over each tab"""
+    batches = {}
+    batch_of = {}
+
+    def batch(batch_id):
+        if batch_id not in batches:
+            batches[batch_id] = {
+                "batch_id": batch_id,
+                "total_students": None,
+                "enrolled": 0,
+                "fees_collected": 0,
+                "fees_pending": 0,
+                "assignments": 0,
+                "submitted": 0,
+                "marks_sum": 0,
+                "marked": 0,
+                "contest_entries": 0,
+                "contest_participants": set(),
+                "mocks": 0,
+                "mocks_passed": 0,
+                "placement_ready": 0,
+            }
+        return batches[batch_id]
+
+    for _, r in batches_ws.records():
+        batch(r.batch_id.strip())["total_students"] = r.total_students
+
+    for _, r in students_ws.records():
+        b = batch(r.batch_id.strip())
+        batch_of[r.registration_id] = b
+        b["enrolled"] += 1
+        b["fees_collected"] += r.fees_paid or 0
+        b["fees_pending"] += r.fees_pending or 0
+
+    for _, r in assignment_ws.records():
+        b = batch_of.get(r.registration_id)
+        if b is None:
+            continue
+        b["assignments"] += 1
+        b["submitted"] += is_submitted(r.status, r.submission_link)
+        if r.marks is not None:
+            b["marks_sum"] += r.marks
+            b["marked"] += 1
+
+    for _, r in contest_ws.records():
+        b = batch_of.get(r.registration_id)
+        if b is None:
+            continue
+        b["contest_entries"] += 1
+        b["contest_participants"].add(r.registration_id)
+
+    for _, r in mock_ws.records():
+        b = batch_of.get(r.registration_id)
+        if b is None:
+            continue
+        b["mocks"] += 1
+        b["mocks_passed"] += get_str_safe(r.status) == "pass"
+
+    results, _ = readiness(assignment_columns(), contest_columns(), mock_columns())
+    for result in results:
+        b = batch_of.get(result["registration_id"])
+        if b is not None and result["placement_ready"] == "Yes":
+            b["placement_ready"] += 1
+
+    return {batch_id: summary_response(b) for batch_id, b in batches.items()}
+
+
+def summary_response(b):
+    return {
+        "batch_id": b["batch_id"],
+        "total_students": b["total_students"],
+        "enrolled": b["enrolled"],
+        "fees": {
+            "collected": b["fees_collected"],
+            "pending": b["fees_pending"],
+        },
+        "assignments": {
+            "total": b["assignments"],
+            "submitted": b["submitted"],
+            "submission_rate": ratio(b["submitted"], b["assignments"]),
+            "mean_marks": round(b["marks_sum"] / b["marked"], 2) if b["marked"] else None,
+        },
+        "contests": {
+            "entries": b["contest_entries"],
+            "participants": len(b["contest_participants"]),
+            "participation_rate": ratio(len(b["contest_participants"]), b["enrolled"]),
+        },
+        "mocks": {
+            "total": b["mocks"],
+            "passed": b["mocks_passed"],
+            "pass_rate": ratio(b["mocks_passed"], b["mocks"]),
+        },
+        "placement_ready": b["placement_ready"],
+    }
+
+
+# =========================
+# Cache
+# =========================
+# All batches are summarised together and kept until any of the five tabs
+# changes version.
+
+_cache = {"versions": None, "summaries": {}}
+_cache_lock = threading.Lock()
+
+
+def batch_summary(batch_id):
+    # fresh_version() reloads a tab once its TTL is up
+    versions = [ws.fresh_version() for ws in SOURCES]
+
+    with _cache_lock:
+        if _cache["versions"] == versions:
+            return _cache["summaries"].get(batch_id)
+
+    summaries = compute_summaries()
+
+    with _cache_lock:
+        _cache["versions"] = versions
+        _cache["summaries"] = summaries
+
+    return summaries.get(batch_id)
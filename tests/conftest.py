@@ -0,0 +1,192 @@
+import os
+import sys
+
+# The app picks its backend when sheets.py is imported: run it on an
+# in-memory SQLite database with the background jobs off
+os.environ.setdefault("STORAGE_BACKEND", "sqlite")
+os.environ.setdefault("SQLITE_PATH", ":memory:")
+os.environ.setdefault("SHEETS_WARM_UP", "false")
+os.environ.setdefault("SHEETS_COMPACT_INTERVAL", "0")
+os.environ.setdefault("SHEETS_SNAPSHOT_PATH", "")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from gspread.utils import a1_to_rowcol
+
+from cache import CachedWorksheet
+from sheets import TABLES, schema
+
+
+# =========================
+# Fake worksheet
+# =========================
+
+class FakeSpreadsheet:
+    def __init__(self, worksheet):
+        self.worksheet = worksheet
+
+    def batch_update(self, body):
+        self.worksheet.calls.append("delete")
+        for request in body["requests"]:
+            r = request["deleteDimension"]["range"]
+            del self.worksheet.rows[r["startIndex"]:r["endIndex"]]
+
+
+class FakeWorksheet:
+    """The few gspread Worksheet calls CachedWorksheet makes, on a list of rows"""
+
+    id = 0
+
+    def __init__(self, rows):
+        self.rows = [list(row) for row in rows]
+        self.calls = []
+        self.spreadsheet = FakeSpreadsheet(self)
+
+    @staticmethod
+    def _trimmed(row):
+        row = list(row)
+        while row and row[-1] == "":
+            row.pop()
+        return row
+
+    def get_all_values(self):
+        self.calls.append("get_all_values")
+        width = max((len(row) for row in self.rows), default=0)
+        return [row + [""] * (width - len(row)) for row in self.rows]
+
+    def row_values(self, row):
+        return self._trimmed(self.rows[row - 1]) if row <= len(self.rows) else []
+
+    def batch_get(self, ranges, major_dimension="ROWS"):
+        result = []
+        for a1 in ranges:
+            start = a1.split(":")[0]
+            if major_dimension == "COLUMNS":
+                col = a1_to_rowcol(start + "1")[1] - 1
+                values = self._trimmed(row[col] if col < len(row) else "" for row in self.rows)
+            else:
+                values = self.row_values(int(start))
+            result.append([values] if values else [])
+        return result
+
+    def append_rows(self, values, **kwargs):
+        self.calls.append("append")
+        self.rows += [[str(v) for v in row] for row in values]
+
+    def batch_update(self, data, **kwargs):
+        self.calls.append("update")
+        for change in data:
+            row, col = a1_to_rowcol(change["range"])
+            cells = self.rows[row - 1]
+            cells += [""] * (col - len(cells))
+            cells[col - 1] = str(change["values"][0][0])
+
+
+def cached_table(tab, rows, sheet=None, **options):
+    """A CachedWorksheet for one of the TABLES over a fake sheet holding `rows`"""
+    spec = TABLES[tab]
+    sheet = sheet or FakeWorksheet([spec["headers"]] + rows)
+    options = {"write_behind": False, "soft_delete": True, **options}
+
+    table = CachedWorksheet(
+        lambda: sheet,
+        spec["title"],
+        key=spec["key"],
+        indexes=spec["indexes"],
+        schema=schema(spec),
+        **options,
+    )
+    return sheet, table
+
+
+# =========================
+# Request bodies
+# =========================
+
+def student(registration_id, batch_id="B1", **fields):
+    return {
+        "registration_id": registration_id,
+        "name": f"S{registration_id}",
+        "email": f"s{registration_id}@example.com",
+        "contact": "1",
+        "degree": "B.Tech",
+        "specialization": "CS",
+        "batch_id": batch_id,
+        "fees": 100,
+        "fees_paid": 50,
+        "fees_pending": 50,
+        "placed": False,
+        **fields,
+    }
+
+
+def batch(batch_id, **fields):
+    return {
+        "batch_id": batch_id,
+        "start_date": "2024-01-01",
+        "end_date": "2024-06-30",
+        "fees": 100,
+        "total_students": 30,
+        **fields,
+    }
+
+
+def assignment(registration_id, number, marks=50, **fields):
+    return {
+        "registration_id": registration_id,
+        "student_name": f"S{registration_id}",
+        "assignment_title": f"A{number}",
+        "assignment_no": number,
+        "assigned_date": "2024-01-01",
+        "due_date": "2024-01-08",
+        "marks": marks,
+        **fields,
+    }
+
+
+def contest(contest_id, registration_id, score=60, rank="5", **fields):
+    return {
+        "contest_id": contest_id,
+        "registration_id": registration_id,
+        "batch_id": 1,
+        "contest_name": f"C{contest_id}",
+        "date": "2024-02-01",
+        "score": score,
+        "rank": rank,
+        **fields,
+    }
+
+
+def mock(mock_id, registration_id, score=70, status="pass", **fields):
+    return {
+        "mock_id": mock_id,
+        "registration_id": registration_id,
+        "batch_id": 1,
+        "interviewer": "I",
+        "score": score,
+        "status": status,
+        **fields,
+    }
+
+
+# =========================
+# Fixtures
+# =========================
+
+@pytest.fixture
+def client():
+    from main import app
+    return TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def empty_tables():
+    yield
+
+    from sheets import tables
+    for table in tables.values():
+        rows = [row for row, _ in table.get_all_rows()]
+        if rows:
+            table.delete_rows(min(rows), max(rows))
@@ -0,0 +1,57 @@
+from aggregates import Aggregates, aggregates, assignment_share
+from conftest import assignment, cached_table, contest, mock
+
+
+def test_writes_are_folded_in_without_a_rebuild(client, monkeypatch):
+    aggregates.fresh()
+
+    def no_rebuild(*args, **kwargs):
+        raise AssertionError("rebuilt instead of applying the delta")
+
+    monkeypatch.setattr(aggregates, "rebuild", no_rebuild)
+
+    client.post("/assignments/", json=assignment(1, 1, 40))
+    client.post("/assignments/", json=assignment(1, 2, 80))
+    client.patch("/assignments/1/1", json={"marks": 60})
+
+    assert not aggregates.is_stale()
+    assert client.get("/placement/1").json()["average_assignment_marks"] == 70
+
+    client.delete("/assignments/1/2")
+
+    assert client.get("/placement/1").json()["average_assignment_marks"] == 60
+
+
+def test_deltas_match_a_rebuild(client):
+    client.post("/assignments/bulk", json=[assignment(1, 1, 80), assignment(2, 1, 30)])
+    client.post("/contests/", json=contest(1, 1, score=70, rank="3"))
+    client.post("/mocks/", json=mock(1, 1))
+    client.patch("/contests/1/1", json={"rank": "12"})
+    client.delete("/mocks/1/1")
+
+    incremental = {n: s.verdict(n) for n, s in aggregates.fresh().items()}
+    aggregates.rebuild()
+
+    assert incremental == {n: s.verdict(n) for n, s in aggregates.state.items()}
+    assert incremental[1]["coding_contest_pass"] is False
+
+
+def test_students_with_no_activity_left_are_dropped(client):
+    client.post("/contests/", json=contest(1, 5))
+    assert aggregates.get(5) is not None
+
+    client.delete("/contests/1/5")
+
+    assert aggregates.get(5) is None
+
+
+def test_views_notice_hand_edits_once_the_ttl_is_up():
+    sheet, table = cached_table("assignment", [["1", "S1", "A", "1", "", "", "", "", "40"]], ttl=0)
+    view = Aggregates({table: assignment_share})
+
+    assert view.get(1).marks_sum == 40
+
+    sheet.rows[1][8] = "90"
+
+    assert view.is_stale()
+    assert view.get(1).marks_sum == 90
@@ -0,0 +1,69 @@
+import numpy as np
+
+import analytics
+from aggregates import aggregates
+from conftest import assignment, cached_table, contest, mock
+from sheets import assignment_ws
+
+
+def seed(client):
+    client.post("/assignments/bulk", json=[
+        assignment(1, 1, 80), assignment(1, 2, 60),
+        assignment(2, 1, 30),
+        assignment(3, 1, 90),
+    ])
+    client.post("/contests/bulk", json=[
+        contest(1, 1, score=70, rank="3"),
+        contest(1, 2, score=90, rank="20"),
+        contest(2, 3, score=40, rank="1"),
+    ])
+    client.post("/mocks/bulk", json=[
+        mock(1, 1, score=75),
+        mock(1, 2, score=80, status="fail"),
+        mock(1, 4, score=65),
+    ])
+
+
+def test_columnar_verdicts_match_the_aggregates(client):
+    seed(client)
+
+    cohort = client.get("/placement/all").json()
+
+    assert cohort["total"] == 4
+    for result in cohort["students"]:
+        summary = aggregates.get(result["registration_id"])
+        assert result == summary.verdict(result["registration_id"])
+
+    ready = {r["registration_id"]: r["placement_ready"] for r in cohort["students"]}
+    assert ready == {1: "Yes", 2: "No", 3: "No", 4: "No"}
+
+
+def test_selected_students_and_unknown_ids(client):
+    seed(client)
+
+    response = client.post("/placement/batch", json={"registration_ids": [3, 1, 99]}).json()
+
+    assert [r["registration_id"] for r in response["students"]] == [3, 1]
+    assert response["not_found"] == [99]
+
+
+def test_rows_without_a_registration_id_are_no_student(client):
+    client.post("/assignments/", json=assignment(1, 1, 50))
+    assignment_ws.append_row(["", "X", "A", "2", "", "", "", "", "70"])
+
+    cohort = client.get("/placement/all").json()
+
+    assert [r["registration_id"] for r in cohort["students"]] == [1]
+
+
+def test_cached_columns_pick_up_edits_once_the_ttl_is_up():
+    sheet, table = cached_table("assignment", [["1", "S1", "A", "1", "", "", "", "", "40"]], ttl=0)
+
+    def marks(records):
+        return analytics.column(records, "marks", np.float64)
+
+    assert analytics.cached_columns(table, marks).tolist() == [40]
+
+    sheet.rows[1][8] = "80"
+
+    assert analytics.cached_columns(table, marks).tolist() == [80]
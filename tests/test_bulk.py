@@ -0,0 +1,34 @@
+from conftest import assignment, student
+
+
+def test_bulk_import_rejects_bad_and_duplicate_rows(client):
+    client.post("/students/", json=student(1))
+
+    body = [student(1), student(2), student(2), {"registration_id": "x"}, student(3)]
+    result = client.post("/students/bulk", json=body).json()
+
+    assert result["accepted"] == [{"registration_id": 2}, {"registration_id": 3}]
+    assert [(r["index"], r["reason"]) for r in result["rejected"][:2]] == [
+        (0, "Already exists"),
+        (2, "Duplicate in upload"),
+    ]
+    assert result["rejected"][2]["index"] == 3
+    assert [s["registration_id"] for s in client.get("/students/").json()] == [1, 2, 3]
+
+
+def test_bulk_import_reads_csv(client):
+    csv = (
+        "registration_id,student_name,assignment_title,assignment_no,assigned_date,due_date,marks\n"
+        "1,S1,A1,1,2024-01-01,2024-01-08,40\n"
+        "1,S1,A2,2,2024-01-01,2024-01-08,\n"
+    )
+    result = client.post(
+        "/assignments/bulk", content=csv, headers={"Content-Type": "text/csv"},
+    ).json()
+
+    assert len(result["accepted"]) == 2
+    assert [a["marks"] for a in client.get("/assignments/").json()] == [40, None]
+
+
+def test_bulk_import_refuses_a_body_that_is_not_a_list(client):
+    assert client.post("/assignments/bulk", json=assignment(1, 1)).status_code == 400
@@ -0,0 +1,51 @@
+from conftest import assignment, batch, contest, mock, student
+
+
+def seed(client):
+    client.post("/batches/", json=batch("B1"))
+    client.post("/batches/", json=batch("B2"))
+    client.post("/students/bulk", json=[student(1, "B1"), student(2, "B1")])
+    client.post("/assignments/bulk", json=[assignment(1, 1), assignment(1, 2), assignment(2, 1)])
+    client.post("/contests/bulk", json=[contest(1, 1), contest(2, 1), contest(1, 2)])
+    client.post("/mocks/", json=mock(1, 1))
+
+
+def test_cascade_delete_removes_the_students_rows(client):
+    seed(client)
+    assert client.get("/placement/1").status_code == 200
+
+    response = client.delete("/students/1", params={"cascade": True}).json()
+
+    assert response["deleted"] == {"assignments": 2, "contests": 2, "mocks": 1}
+    assert client.get("/students/1").status_code == 404
+    assert [a["registration_id"] for a in client.get("/assignments/").json()] == [2]
+    # The aggregates dropped the student's marks with the rows
+    assert client.get("/placement/1").status_code == 404
+    assert client.get("/placement/2").status_code == 200
+
+
+def test_plain_delete_keeps_the_activity(client):
+    seed(client)
+
+    assert "deleted" not in client.delete("/students/1").json()
+    assert len(client.get("/contests/").json()) == 3
+
+
+def test_move_batch_updates_contests_and_mocks(client):
+    seed(client)
+
+    response = client.post("/students/1/move-batch", json={"batch_id": "B2"})
+
+    assert response.json()["updated"] == {"contests": 2, "mocks": 1}
+    assert response.headers["ETag"] == client.get("/students/1").headers["ETag"]
+    assert client.get("/students/1").json()["batch_id"] == "B2"
+    assert {c["registration_id"]: c["batch_id"] for c in client.get("/contests/").json()
+            if c["registration_id"] == 1} == {1: "B2"}
+    assert client.get("/mocks/1/1").json()["batch_id"] == "B2"
+
+
+def test_move_batch_needs_the_student_and_the_batch(client):
+    seed(client)
+
+    assert client.post("/students/9/move-batch", json={"batch_id": "B2"}).status_code == 404
+    assert client.post("/students/1/move-batch", json={"batch_id": "B9"}).status_code == 404
@@ -0,0 +1,53 @@
+from changes import EPOCH, ChangeLog
+from conftest import cached_table, student
+
+
+def test_changes_since_an_id(client):
+    last_id = client.get("/changes/").json()["last_id"]
+
+    client.post("/students/", json=student(1))
+    client.patch("/students/1", json={"name": "New"})
+    client.delete("/students/1")
+
+    feed = client.get("/changes/", params={"since": last_id}).json()
+    changes = feed["changes"]
+
+    assert not feed["reset"]
+    assert [c["op"] for c in changes] == ["create", "update", "delete"]
+    assert [c["id"] for c in changes] == [f"{EPOCH}:{c['seq']}" for c in changes]
+    assert changes[0]["resource"] == "students" and changes[0]["key"] == {"registration_id": 1}
+    assert changes[1]["record"]["name"] == "New" and changes[2]["record"] is None
+    assert feed["last_id"] == changes[-1]["id"]
+
+    assert client.get("/changes/", params={"since": feed["last_id"]}).json()["changes"] == []
+
+
+def test_ids_from_another_epoch_reset(client):
+    feed = client.get("/changes/", params={"since": "other:1"}).json()
+
+    assert feed["reset"] and feed["changes"] == []
+    assert feed["epoch"] == EPOCH
+
+
+def test_ids_ahead_of_the_log_reset(client):
+    seq = client.get("/changes/").json()["last_seq"]
+
+    assert client.get("/changes/", params={"since": f"{EPOCH}:{seq + 10}"}).json()["reset"]
+
+
+def test_bare_sequence_numbers_are_refused(client):
+    assert client.get("/changes/", params={"since": "5"}).status_code == 400
+    assert client.get("/changes/", params={"since": f"{EPOCH}:x"}).status_code == 400
+
+
+def test_changes_dropped_from_the_log_reset():
+    _, table = cached_table("students", [])
+    log = ChangeLog({"students": table}, size=2)
+    table.get_all_rows()  # writes are only logged once the tab is loaded
+
+    table.append_rows([[str(n), f"S{n}"] for n in range(1, 4)])
+
+    assert log.since(0, 10) == ([], True)
+
+    changes, reset = log.since(1, 10)
+    assert not reset and [c["key"] for c in changes] == [{"registration_id": 2}, {"registration_id": 3}]
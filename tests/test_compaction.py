@@ -0,0 +1,92 @@
+import threading
+import time
+
+import sheets
+from conftest import cached_table
+
+
+def table_of(*ids, **options):
+    return cached_table("students", [[str(n), f"S{n}"] for n in ids], **options)
+
+
+def ids(sheet):
+    return [row[0] for row in sheet.rows[1:]]
+
+
+def test_soft_delete_hides_the_row():
+    sheet, table = table_of(1, 2, 3)
+
+    table.delete_record([2])
+
+    assert table.find(2) == (None, None)
+    assert [row[0] for _, row in table.get_all_rows()] == ["1", "3"]
+    assert ids(sheet) == ["1", "2", "3"]
+    assert sheet.rows[0][-1] == "_deleted" and sheet.rows[2][-1] == "True"
+
+
+def test_compact_removes_the_marked_rows():
+    sheet, table = table_of(1, 2, 3, 4)
+    table.delete_record([2])
+    table.delete_record([3])
+
+    assert table.compact() == 2
+    assert ids(sheet) == ["1", "4"]
+    assert table.find(4)[0] == 3
+
+
+def test_compact_keeps_rows_another_worker_moved():
+    sheet, table = table_of(1, 2, 3)
+    table.delete_record([2])
+
+    # Another worker has already removed the marked row and appended a
+    # student; this copy's row numbers are out of date
+    del sheet.rows[2]
+    sheet.rows.append(["9", "S9"])
+
+    assert table.compact() == 0
+    assert ids(sheet) == ["1", "3", "9"]
+
+
+def test_readers_carry_on_while_rows_are_deleted():
+    sheet, table = table_of(1, 2, 3)
+    table.delete_record([2])
+
+    deleting = threading.Event()
+    delete = sheet.spreadsheet.batch_update
+
+    def slow_delete(body):
+        deleting.set()
+        time.sleep(0.5)
+        delete(body)
+
+    sheet.spreadsheet.batch_update = slow_delete
+    compaction = threading.Thread(target=table.compact)
+    compaction.start()
+    deleting.wait(1)
+
+    start = time.monotonic()
+    row, _ = table.find(3)
+    elapsed = time.monotonic() - start
+    compaction.join()
+
+    assert row == 4
+    assert elapsed < 0.25
+    assert table.find(3)[0] == 3
+
+
+def test_one_failing_tab_does_not_stop_the_others(monkeypatch):
+    broken_sheet, broken = table_of(1, 2)
+    sheet, table = table_of(1, 2)
+    for t in (broken, table):
+        t.delete_record([1])
+
+    def refused(body):
+        raise ValueError("refused")
+
+    broken_sheet.spreadsheet.batch_update = refused
+    monkeypatch.setattr(sheets, "tables", {"broken": broken, "students": table})
+
+    sheets.compact()
+
+    assert ids(broken_sheet) == ["1", "2"]
+    assert ids(sheet) == ["2"]
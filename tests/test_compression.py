@@ -0,0 +1,52 @@
+from compression import negotiate
+from conftest import assignment, student
+
+
+def test_large_lists_are_gzipped(client):
+    client.post("/students/bulk", json=[student(n) for n in range(1, 30)])
+
+    response = client.get("/students/", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert len(response.json()) == 29
+
+
+def test_other_large_responses_are_gzipped(client):
+    client.post("/assignments/bulk", json=[assignment(n, 1) for n in range(1, 30)])
+
+    response = client.get("/placement/all", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.json()["total"] == 29
+
+
+def test_small_bodies_and_other_encodings_stay_plain(client):
+    client.post("/students/bulk", json=[student(n) for n in range(1, 30)])
+
+    small = client.get("/students/1", headers={"Accept-Encoding": "gzip"})
+    identity = client.get("/students/", headers={"Accept-Encoding": "identity"})
+
+    assert "Content-Encoding" not in small.headers
+    assert "Content-Encoding" not in identity.headers
+
+
+def test_negotiation():
+    assert negotiate("gzip, deflate") == "gzip"
+    assert negotiate("gzip;q=0, deflate") is None
+    assert negotiate("*") == "gzip"
+    assert negotiate("") is None
+
+
+def test_cache_control_per_router(client):
+    client.post("/students/", json=student(1))
+    client.post("/assignments/", json=assignment(1, 1))
+
+    etag = client.get("/students/1").headers["ETag"]
+
+    assert client.get("/students/").headers["Cache-Control"] == "no-cache"
+    assert client.get("/students/1", headers={"If-None-Match": etag}).headers["Cache-Control"] == "no-cache"
+    assert client.get("/placement/1").headers["Cache-Control"] == "max-age=30"
+    assert client.get("/changes/").headers["Cache-Control"] == "no-store"
+    assert "Cache-Control" not in client.get("/students/9").headers
+    assert "Cache-Control" not in client.post("/students/", json=student(2)).headers
@@ -0,0 +1,73 @@
+import pytest
+
+from conftest import FakeWorksheet, cached_table, student
+from sheets import TABLES
+from storage import PreconditionFailed
+from write_queue import merge
+
+
+def test_stale_if_match_is_refused(client):
+    client.post("/students/", json=student(1))
+    etag = client.get("/students/1").headers["ETag"]
+
+    updated = client.patch("/students/1", json={"name": "New"}, headers={"If-Match": etag})
+    stale = client.patch("/students/1", json={"name": "Newer"}, headers={"If-Match": etag})
+
+    assert updated.status_code == 200
+    assert updated.headers["ETag"] == client.get("/students/1").headers["ETag"] != etag
+    assert stale.status_code == 412
+    assert client.delete("/students/1", headers={"If-Match": etag}).status_code == 412
+    assert client.delete("/students/1", headers={"If-Match": "*"}).status_code == 200
+
+
+def test_cached_table_checks_the_etag():
+    _, table = cached_table("students", [["1", "S1"]])
+    etag = table.etag(*table.find(1))
+
+    table.update_record([1], {2: "A"}, etag)
+
+    with pytest.raises(PreconditionFailed):
+        table.update_record([1], {2: "B"}, etag)
+
+
+def test_two_workers_holding_the_same_etag():
+    sheet = FakeWorksheet([TABLES["students"]["headers"], ["1", "S1"]])
+    _, first = cached_table("students", [], sheet=sheet, write_behind=True)
+    _, second = cached_table("students", [], sheet=sheet, write_behind=True)
+
+    etag = first.etag(*first.find(1))
+    second.find(1)
+
+    first.update_record([1], {2: "first"}, etag)
+
+    with pytest.raises(PreconditionFailed):
+        second.update_record([1], {2: "second"}, etag)
+
+    assert sheet.rows[1][:2] == ["1", "first"]
+
+
+def test_queued_update_follows_a_moved_row():
+    sheet, table = cached_table("students", [["1", "S1"], ["2", "S2"]], write_behind=True)
+    table._queue.flush_interval = 60
+
+    table.update_record([2], {2: "edited"})
+
+    # Another worker removes student 1 before this write is sent
+    del sheet.rows[1]
+    table.flush()
+
+    assert sheet.rows[1:] == [["2", "edited"]]
+
+
+def test_merged_writes_keep_the_keys_rows_held_first():
+    updates = [
+        ("update", {(2, 2): "a"}, {2: ("1",)}),
+        ("update", {(2, 3): "b"}, {2: ("9",)}),
+    ]
+    deletes = [
+        ("delete", [(2, 2)], {2: ("1",)}),
+        ("delete", [(2, 2)], {2: ("2",)}),
+    ]
+
+    assert merge(updates)[1] == ({(2, 2): "a", (2, 3): "b"}, {2: ("1",)})
+    assert merge(deletes)[1] == ([(2, 2), (2, 2)], [{2: ("1",)}, {2: ("2",)}])
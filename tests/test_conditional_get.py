@@ -0,0 +1,43 @@
+from conftest import student
+
+
+def test_list_answers_304_until_the_tab_changes(client):
+    client.post("/students/", json=student(1))
+    first = client.get("/students/")
+    etag = first.headers["ETag"]
+
+    unchanged = client.get("/students/", headers={"If-None-Match": etag})
+
+    assert unchanged.status_code == 304
+    assert unchanged.headers["ETag"] == etag
+    assert unchanged.content == b""
+
+    client.post("/students/", json=student(2))
+    changed = client.get("/students/", headers={"If-None-Match": etag})
+
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert len(changed.json()) == 2
+
+
+def test_list_etag_depends_on_the_query(client):
+    client.post("/students/", json=student(1))
+
+    etag = client.get("/students/").headers["ETag"]
+    other = client.get("/students/", params={"fields": "name"}).headers["ETag"]
+
+    assert etag.startswith('W/"') and other != etag
+    assert client.get("/students/", params={"fields": "name"},
+                      headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_record_answers_304_until_it_changes(client):
+    client.post("/students/", json=student(1))
+    etag = client.get("/students/1").headers["ETag"]
+
+    assert client.get("/students/1", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/students/1", headers={"If-None-Match": f'W/{etag}, "x"'}).status_code == 304
+
+    client.patch("/students/1", json={"name": "New"})
+
+    assert client.get("/students/1", headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,30 @@
+import csv
+import io
+import json
+
+from conftest import student
+
+
+def test_ndjson_export_streams_one_record_per_line(client):
+    client.post("/students/bulk", json=[student(i) for i in range(1, 4)])
+
+    response = client.get("/students/export")
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["registration_id"] for r in records] == [1, 2, 3]
+    assert records[0]["placed"] is False
+
+
+def test_csv_export_has_a_header_row(client):
+    client.post("/students/", json=student(1))
+
+    response = client.get("/students/export?format=csv")
+
+    assert 'filename="students.csv"' in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(r["registration_id"], r["name"]) for r in rows] == [("1", "S1")]
+
+
+def test_unknown_export_format_is_refused(client):
+    assert client.get("/students/export?format=xml").status_code == 422
@@ -0,0 +1,52 @@
+from conftest import cached_table
+from indexes import Index
+
+VALUES = [
+    ["registration_id", "batch_id"],
+    ["1", "B1"],
+    ["2", "B2"],
+    ["3", "B1"],
+    ["4", "B2"],
+    ["5", "B1"],
+]
+
+
+def test_build_skips_excluded_rows():
+    index = Index(["batch_id"])
+    index.build(VALUES, exclude={4})
+
+    assert index.get(["B1"]) == [2, 6]
+    assert index.get(["B2"]) == [3, 5]
+
+
+def test_shift_moves_later_rows_up():
+    index = Index(["registration_id"])
+    index.build(VALUES)
+
+    index.shift(3, 4)
+
+    assert index.first(["1"]) == 2
+    assert index.first(["2"]) is None
+    assert index.first(["3"]) is None
+    assert index.first(["4"]) == 3
+
+
+def test_shift_drops_emptied_keys():
+    index = Index(["batch_id"])
+    index.build(VALUES)
+
+    index.shift(3, 3)
+    index.shift(4, 4)
+
+    assert index.get(["B2"]) == []
+    assert index.get(["B1"]) == [2, 3, 4]
+
+
+def test_composite_key_lookup_on_a_cached_tab():
+    rows = [["1", "S1", "A", "1"], ["1", "S1", "B", "2"], ["2", "S2", "A", "1"]]
+    _, table = cached_table("assignment", rows)
+
+    assert table.find(1, 2)[0] == 3
+    assert table.find(" 2 ", "1")[0] == 4
+    assert table.find(2, 2) == (None, None)
+    assert [n for n, _ in table.find_all("registration_id", 1)] == [2, 3]
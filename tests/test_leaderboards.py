@@ -0,0 +1,56 @@
+from conftest import contest, student
+
+
+def test_contest_board_orders_by_score_then_rank(client):
+    client.post("/contests/bulk", json=[
+        contest(1, 1, score=70, rank="4"),
+        contest(1, 2, score=90, rank="9"),
+        contest(1, 3, score=70, rank="2"),
+        contest(2, 1, score=10),
+    ])
+
+    board = client.get("/contests/1/leaderboard", params={"registration_id": 1}).json()
+
+    assert [e["registration_id"] for e in board["entries"]] == [2, 3, 1]
+    assert board["total"] == 3
+    assert board["me"] == {"position": 3, "registration_id": 1, "score": 70, "rank": 4}
+
+
+def test_contest_board_pages_and_follows_writes(client):
+    client.post("/contests/bulk", json=[contest(1, n, score=10 * n) for n in range(1, 6)])
+    client.patch("/contests/1/1", json={"score": 100})
+    client.delete("/contests/1/5")
+
+    board = client.get("/contests/1/leaderboard", params={"limit": 2, "offset": 1}).json()
+
+    assert [(e["position"], e["registration_id"]) for e in board["entries"]] == [(2, 4), (3, 3)]
+    assert board["total"] == 4
+    assert client.get("/contests/9/leaderboard").status_code == 404
+
+
+def test_batch_board_groups_by_the_students_batch(client):
+    # Contest rows carry an int batch_id; the board must still be found
+    # under the students' string batch
+    client.post("/students/bulk", json=[student(1, "B1"), student(2, "B1"), student(3, "B2")])
+    client.post("/contests/bulk", json=[
+        contest(1, 1, score=40), contest(2, 1, score=30),
+        contest(1, 2, score=50),
+        contest(1, 3, score=90),
+    ])
+
+    board = client.get("/batches/B1/leaderboard").json()
+
+    assert [(e["registration_id"], e["total_score"]) for e in board["entries"]] == [(1, 70), (2, 50)]
+
+
+def test_moving_a_student_moves_their_total(client):
+    client.post("/students/bulk", json=[student(1, "B1"), student(2, "B1")])
+    client.post("/contests/bulk", json=[contest(1, 1, score=40), contest(1, 2, score=50)])
+
+    client.patch("/students/1", json={"batch_id": "B2"})
+
+    b1 = client.get("/batches/B1/leaderboard").json()
+    b2 = client.get("/batches/B2/leaderboard").json()
+
+    assert [e["registration_id"] for e in b1["entries"]] == [2]
+    assert [(e["registration_id"], e["total_score"]) for e in b2["entries"]] == [(1, 40)]
@@ -0,0 +1,41 @@
+from conftest import student
+
+
+def ids(response):
+    return [s["registration_id"] for s in response.json()]
+
+
+def test_cursor_pages_through_every_record(client):
+    for i in range(1, 6):
+        client.post("/students/", json=student(i))
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/students/", params=params)
+        seen += ids(page)
+
+        cursor = page.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert seen == [1, 2, 3, 4, 5]
+    assert client.get("/students/?cursor=abc").status_code == 400
+
+
+def test_filters_compare_typed_values(client):
+    client.post("/students/", json=student(1))
+    client.post("/students/", json=student(2, batch_id="B2", placed=True, fees=250.5))
+
+    assert ids(client.get("/students/?placed=false")) == [1]
+    assert ids(client.get("/students/?fees=250.50")) == [2]
+    assert ids(client.get("/students/?registration_id=2.0")) == [2]
+    assert ids(client.get("/students/?batch_id=%20B2%20&placed=true")) == [2]
+    assert client.get("/students/?fees=lots").status_code == 400
+
+
+def test_fields_project_the_response(client):
+    client.post("/students/", json=student(1))
+
+    assert client.get("/students/?fields=name,batch_id").json() == [{"name": "S1", "batch_id": "B1"}]
+    assert client.get("/students/?fields=nope").status_code == 400
@@ -0,0 +1,30 @@
+from conftest import assignment, batch, contest, mock, student
+
+
+def test_profile_joins_everything_about_a_student(client):
+    client.post("/batches/", json=batch("B1"))
+    client.post("/students/bulk", json=[student(1, "B1"), student(2, "B1")])
+    client.post("/assignments/bulk", json=[assignment(1, 1, 80), assignment(1, 2, 60), assignment(2, 1)])
+    client.post("/contests/", json=contest(1, 1))
+    client.post("/mocks/", json=mock(1, 1))
+
+    profile = client.get("/students/1/profile").json()
+
+    assert profile["student"]["name"] == "S1"
+    assert profile["batch"]["batch_id"] == "B1"
+    assert [a["assignment_no"] for a in profile["assignments"]] == [1, 2]
+    assert [c["contest_id"] for c in profile["contests"]] == [1]
+    assert [m["mock_id"] for m in profile["mocks"]] == [1]
+    assert profile["placement"] == client.get("/placement/1").json()
+    assert profile["placement"]["placement_ready"] == "Yes"
+
+
+def test_profile_of_a_student_with_no_activity(client):
+    client.post("/students/", json=student(1, "B9"))
+
+    profile = client.get("/students/1/profile").json()
+
+    assert profile["batch"] is None
+    assert profile["assignments"] == profile["contests"] == profile["mocks"] == []
+    assert profile["placement"]["placement_ready"] == "No"
+    assert client.get("/students/2/profile").status_code == 404
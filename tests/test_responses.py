@@ -0,0 +1,41 @@
+import orjson
+
+import responses
+from conftest import student
+from responses import ResponseCache
+
+
+def test_repeat_lists_are_served_from_the_cache(client, monkeypatch):
+    encoded = []
+
+    def encode(content):
+        encoded.append(content)
+        return orjson.dumps(content)
+
+    monkeypatch.setattr(responses, "encode", encode)
+    client.post("/students/", json=student(1))
+
+    first = client.get("/students/", headers={"Accept-Encoding": "identity"})
+    second = client.get("/students/", headers={"Accept-Encoding": "identity"})
+
+    assert first.content == second.content
+    assert first.json()[0]["registration_id"] == 1
+    assert len(encoded) == 1
+
+    client.post("/students/", json=student(2))
+
+    assert len(client.get("/students/").json()) == 2
+    assert len(encoded) == 2
+
+
+def test_cache_drops_the_least_recently_used():
+    cache = ResponseCache(max_bytes=10)
+    cache.put("a", b"aaaa", {})
+    cache.put("b", b"bbbb", {})
+    cache.get("a")
+    cache.put("c", b"cccc", {})
+    cache.put("huge", b"x" * 11, {})
+
+    assert cache.get("b") is None and cache.get("huge") is None
+    assert cache.get("a") == (b"aaaa", {}) and cache.get("c") == (b"cccc", {})
+    assert cache.size == 8
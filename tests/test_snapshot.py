@@ -0,0 +1,68 @@
+import os
+import pickle
+
+import pytest
+
+import snapshot
+from conftest import cached_table
+
+
+@pytest.fixture
+def students(monkeypatch):
+    sheet, table = cached_table("students", [["1", "S1"], ["2", "S2"]])
+    monkeypatch.setattr(snapshot, "tables", {"students": table})
+    monkeypatch.setattr(snapshot, "_saved_versions", {})
+    table.get_all_rows()
+    return sheet, table
+
+
+def records(table):
+    return [record for _, record in table.records()]
+
+
+def test_round_trip(students, monkeypatch, tmp_path):
+    _, table = students
+    path = str(tmp_path / "snapshot.pkl")
+
+    assert snapshot.save(path) == 1
+
+    sheet, fresh = cached_table("students", [])
+    monkeypatch.setattr(snapshot, "tables", {"students": fresh})
+
+    assert snapshot.restore(path) == 1
+    assert records(fresh) == records(table)
+    assert fresh.find(2)[0] == 3
+    assert sheet.calls == []  # served from the snapshot, not the sheet
+
+
+def test_save_is_skipped_while_nothing_changed(students, tmp_path):
+    _, table = students
+    path = str(tmp_path / "snapshot.pkl")
+
+    assert snapshot.save(path) == 1
+    assert snapshot.save(path) == 0
+
+    table.append_rows([["3", "S3"]])
+
+    assert snapshot.save(path) == 1
+
+
+def test_another_workers_temp_file_is_left_alone(students, tmp_path):
+    path = str(tmp_path / "snapshot.pkl")
+    # What a worker mid-save used to hold at the shared temp name
+    os.mkdir(f"{path}.tmp")
+
+    assert snapshot.save(path) == 1
+    assert os.path.isdir(f"{path}.tmp")
+    assert not any(name.endswith(f".{os.getpid()}.tmp") for name in os.listdir(tmp_path))
+
+
+def test_unreadable_snapshots_are_ignored(students, tmp_path):
+    old = tmp_path / "old.pkl"
+    old.write_bytes(pickle.dumps({"format": 0, "tables": {}}))
+    broken = tmp_path / "broken.pkl"
+    broken.write_bytes(b"not a pickle")
+
+    assert snapshot.restore(str(old)) == 0
+    assert snapshot.restore(str(broken)) == 0
+    assert snapshot.restore(str(tmp_path / "missing.pkl")) == 0
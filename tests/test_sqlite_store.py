@@ -0,0 +1,52 @@
+import pytest
+
+from etags import row_etag
+from sheets import tables
+from storage import PreconditionFailed, RecordNotFound
+
+students = tables["students"]
+
+
+def row(registration_id, batch_id="B1"):
+    return [registration_id, f"S{registration_id}", "", "", "", "", batch_id]
+
+
+def test_rows_keep_their_number_when_others_are_deleted():
+    students.append_rows([row(1), row(2), row(3)])
+    third, _ = students.find(3)
+
+    students.delete_record([2])
+
+    assert students.find(3)[0] == third
+    assert [cells[0] for _, cells in students.get_all_rows()] == ["1", "3"]
+
+
+def test_lookups_by_key_and_index_compare_stripped_text():
+    students.append_rows([row(" 7 ", "B2"), row(8, "B2"), row(9)])
+
+    assert students.find(7)[1][0] == "7"
+    assert [cells[0] for _, cells in students.find_all("batch_id", " B2")] == ["7", "8"]
+
+
+def test_update_record_checks_the_etag():
+    students.append_row(row(1))
+    _, cells = students.find(1)
+
+    with pytest.raises(PreconditionFailed):
+        students.update_record([1], {2: "New"}, etag='"stale"')
+
+    updated = students.update_record([1], {2: "New"}, etag=row_etag(cells))
+    assert updated[1] == "New"
+
+    with pytest.raises(RecordNotFound):
+        students.delete_record([99])
+
+
+def test_update_all_and_delete_all_touch_every_matching_row():
+    students.append_rows([row(1), row(2), row(3, "B2")])
+
+    assert students.update_all("batch_id", "B1", {7: "B3"}) == 2
+    assert [cells[0] for _, cells in students.find_all("batch_id", "B3")] == ["1", "2"]
+
+    assert students.delete_all("batch_id", "B3") == 2
+    assert [cells[0] for _, cells in students.get_all_rows()] == ["3"]
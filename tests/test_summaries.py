@@ -0,0 +1,66 @@
+import summaries
+from conftest import assignment, batch, cached_table, contest, mock, student
+
+
+def test_batch_summary(client):
+    client.post("/batches/", json=batch("B1", total_students=3))
+    client.post("/students/bulk", json=[
+        student(1, "B1", fees_paid=100, fees_pending=0),
+        student(2, "B1"),
+        student(3, "B2"),
+    ])
+    client.post("/assignments/bulk", json=[
+        assignment(1, 1, 80, status="submitted"),
+        assignment(2, 1, 40, submission_link="http://x"),
+        assignment(2, 2, None, status="pending"),
+        assignment(3, 1, 10, status="submitted"),
+    ])
+    client.post("/contests/bulk", json=[contest(1, 1), contest(2, 1), contest(1, 3)])
+    client.post("/mocks/bulk", json=[mock(1, 1), mock(1, 2, status="fail")])
+
+    summary = client.get("/batches/B1/summary").json()
+
+    assert summary == {
+        "batch_id": "B1",
+        "total_students": 3,
+        "enrolled": 2,
+        "fees": {"collected": 150, "pending": 50},
+        "assignments": {"total": 3, "submitted": 2, "submission_rate": 0.6667, "mean_marks": 60},
+        "contests": {"entries": 2, "participants": 1, "participation_rate": 0.5},
+        "mocks": {"total": 2, "passed": 1, "pass_rate": 0.5},
+        "placement_ready": 1,
+    }
+    assert client.get("/batches/B9/summary").status_code == 404
+
+
+def test_summaries_are_reused_until_a_tab_changes(client, monkeypatch):
+    monkeypatch.setattr(summaries, "_cache", {"versions": None, "summaries": {}})
+    client.post("/students/", json=student(1, "B1"))
+
+    assert client.get("/batches/B1/summary").json()["enrolled"] == 1
+
+    client.post("/students/", json=student(2, "B1"))
+
+    assert client.get("/batches/B1/summary").json()["enrolled"] == 2
+
+
+def test_hand_edits_show_up_once_the_ttl_is_up(monkeypatch):
+    sheet, table = cached_table("batches", [["B1", "", "", "", "100", "30"]], ttl=0)
+    monkeypatch.setattr(summaries, "SOURCES", [table])
+    monkeypatch.setattr(summaries, "_cache", {"versions": None, "summaries": {}})
+
+    computed = []
+
+    def compute_summaries():
+        computed.append(sheet.rows[1][5])
+        return {"B1": {"total_students": sheet.rows[1][5]}}
+
+    monkeypatch.setattr(summaries, "compute_summaries", compute_summaries)
+
+    assert summaries.batch_summary("B1") == {"total_students": "30"}
+    assert summaries.batch_summary("B1") == {"total_students": "30"}
+
+    sheet.rows[1][5] = "40"
+
+    assert summaries.batch_summary("B1") == {"total_students": "40"}
+    assert computed == ["30", "40"]
@@ -0,0 +1,84 @@
+import requests
+
+import write_queue
+from write_queue import TokenBucket, WriteQueue, merge
+
+
+def queue(send, failures):
+    return WriteQueue("test", send, failures.append, quota=TokenBucket(60000))
+
+
+def test_merge_appends_with_the_same_options():
+    pending = [
+        ("append", [["1"]], {"value_input_option": "RAW"}),
+        ("append", [["2"]], {"value_input_option": "RAW"}),
+        ("append", [["3"]], {"value_input_option": "USER_ENTERED"}),
+    ]
+
+    assert merge(pending) == ("append", ([["1"], ["2"]], {"value_input_option": "RAW"}), 2)
+
+
+def test_merge_updates_until_another_kind():
+    pending = [
+        ("update", {(2, 1): "a"}, {}),
+        ("update", {(2, 1): "b", (3, 1): "c"}, {}),
+        ("delete", [(1, 2)], {}),
+        ("update", {(4, 1): "d"}, {}),
+    ]
+
+    assert merge(pending) == ("update", ({(2, 1): "b", (3, 1): "c"}, {}), 2)
+
+
+def test_flush_sends_merged_batches_in_order():
+    sent, failures = [], []
+    q = queue(lambda kind, payload: sent.append(kind), failures)
+    q.pending = [
+        ("append", [["1"]], {}),
+        ("append", [["2"]], {}),
+        ("update", {(2, 1): "x"}, {}),
+        ("append", [["3"]], {}),
+    ]
+
+    q.flush()
+
+    assert sent == ["append", "update", "append"]
+    assert not q.pending and not failures
+
+
+def test_a_refused_write_drops_only_itself():
+    sent, failures = [], []
+
+    def send(kind, payload):
+        cells, _ = payload
+        if (3, 1) in cells:
+            raise ValueError("bad range")
+        sent.append(cells)
+
+    q = queue(send, failures)
+    q.pending = [
+        ("update", {(2, 1): "a"}, {}),
+        ("update", {(3, 1): "b"}, {}),
+        ("update", {(4, 1): "c"}, {}),
+    ]
+
+    q.flush()
+
+    assert sent == [{(2, 1): "a"}, {(4, 1): "c"}]
+    assert len(failures) == 1 and not q.pending
+
+
+def test_retryable_errors_are_retried_then_drop_the_queue(monkeypatch):
+    monkeypatch.setattr(write_queue, "backoff", lambda attempt: 0)
+    calls, failures = [], []
+
+    def send(kind, payload):
+        calls.append(kind)
+        raise requests.ConnectionError("offline")
+
+    q = queue(send, failures)
+    q.pending = [("append", [["1"]], {}), ("update", {(2, 1): "a"}, {})]
+
+    q.flush(max_attempts=3)
+
+    assert calls == ["append"] * 3
+    assert len(failures) == 1 and not q.pending
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+
+
+class View:
+    """
+    State derived from one or more tables and kept up to date on write.
+
+    Every local write to a source table arrives as removed/added rows and
+    is folded into `state` as a delta through apply(), one typed record
+    (see schema.py) at a time. A table version the
+    view did not see (a reload, a write from another worker) marks it
+    stale, and the next fresh() call rebuilds it from the tables.
+
+    Subclasses implement empty() and apply(state, ws, record, sign), where
+    sign is +1 for an added row and -1 for a removed one.
+    """
+
+    def __init__(self, tables):
+        self.tables = list(tables)
+        self.state = self.empty()
+        self.versions = {}
+        self.lock = threading.RLock()
+
+        for ws in self.tables:
+            ws.subscribe(self.on_change)
+
+    def empty(self):
+        raise NotImplementedError
+
+    def apply(self, state, ws, record, sign):
+        raise NotImplementedError
+
+    def _current_versions(self):
+        # fresh_version() reloads a table whose TTL is up, so hand edits
+        # and other workers' writes show up as a moved version
+        return {ws.title: ws.fresh_version() for ws in self.tables}
+
+    def on_change(self, ws, version_before, removed, added):
+        with self.lock:
+            if self.versions.get(ws.title) != version_before:
+                return  # already stale, the next read rebuilds
+
+            for row in removed:
+                self.apply(self.state, ws, ws.schema.parse(row), -1)
+            for row in added:
+                self.apply(self.state, ws, ws.schema.parse(row), 1)
+
+            self.versions[ws.title] = ws.version
+
+    def is_stale(self):
+        return self.versions != self._current_versions()
+
+    def rebuild(self, attempts=3):
+        """Recompute the whole view from the tables, e.g. after hand edits"""
+        for _ in range(attempts):
+            versions = self._current_versions()
+            state = self.empty()
+
+            for ws in self.tables:
+                for _, record in ws.records():
+                    self.apply(state, ws, record, 1)
+
+            # A version that moved while we read (a reload or a write that
+            # slipped in) means the snapshot may be torn; go round again
+            if self._current_versions() == versions:
+                break
+
+        with self.lock:
+            self.state = state
+            self.versions = versions
+
+    def fresh(self):
+        if self.is_stale():
+            self.rebuild()
+        return self.state
+
+    async def afresh(self):
+        # is_stale() may reload a table from Google
+        if await asyncio.to_thread(self.is_stale):
+            await asyncio.to_thread(self.rebuild)
+        return self.state
@@ -0,0 +1,252 @@
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+from gspread.exceptions import APIError
+
+from storage import StorageUnavailable
+
+logger = logging.getLogger(__name__)
+
+# -------------------------
+# Settings
+# -------------------------
+# Writes are queued and sent to Google in batches. Set SHEETS_WRITE_BEHIND
+# to false to send every write straight away instead.
+WRITE_BEHIND = os.environ.get("SHEETS_WRITE_BEHIND", "true").lower() in ["true", "yes", "1"]
+
+# Write requests per minute shared by every tab of this process (Google's
+# default quota is 60 per user per minute). The bucket is not shared
+# between processes: with several workers, divide the quota among them.
+WRITE_QUOTA = float(os.environ.get("SHEETS_WRITE_QUOTA", "60"))
+
+# A tab is flushed once this many writes are pending, or this many seconds
+# after the last flush, whichever comes first
+FLUSH_SIZE = int(os.environ.get("SHEETS_FLUSH_SIZE", "50"))
+FLUSH_INTERVAL = float(os.environ.get("SHEETS_FLUSH_INTERVAL", "1"))
+
+# Most queued writes merged into one request
+MAX_BATCH = 500
+
+MAX_BACKOFF = 60.0
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+# -------------------------
+# Quota
+# -------------------------
+
+class TokenBucket:
+    """Blocking token bucket allowing `per_minute` requests, in bursts of up to `capacity`"""
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60
+        self.capacity = capacity or max(per_minute, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+
+write_quota = TokenBucket(WRITE_QUOTA)
+
+
+def is_retryable(error):
+    """Quota, server and network errors are worth another try; the rest are not"""
+    if isinstance(error, APIError):
+        return error.response.status_code in RETRYABLE_STATUS
+    return isinstance(error, (requests.ConnectionError, requests.Timeout, StorageUnavailable))
+
+
+def backoff(attempt):
+    """Exponential backoff with jitter, capped at MAX_BACKOFF seconds"""
+    return min(MAX_BACKOFF, 2 ** attempt) * random.uniform(0.5, 1)
+
+
+# -------------------------
+# Merging
+# -------------------------
+# Pending writes are tuples:
+#   ("append", rows, kwargs)
+#   ("update", {(row, col): value}, {row: key})
+#   ("delete", [(start_index, end_index), ...], {row: key})
+# Row numbers are those of the local copy when the write was queued, which
+# match the sheet as long as the writes reach it in the same order. The
+# keys those rows held then let the tab check, at send time, that another
+# worker has not moved them.
+
+def merge(pending):
+    """
+    The leading run of same-kind writes as one request.
+
+    Returns (kind, payload, count) where count is how many queued writes
+    the request covers.
+    """
+    kind = pending[0][0]
+    run = []
+
+    for op in pending[:MAX_BATCH]:
+        if op[0] != kind or (kind == "append" and op[2] != pending[0][2]):
+            break
+        run.append(op)
+
+    if kind == "append":
+        payload = ([row for op in run for row in op[1]], run[0][2])
+    elif kind == "update":
+        cells, keys = {}, {}
+        for _, op_cells, op_keys in run:
+            cells.update(op_cells)
+            # The key a row held before the first of these writes is the
+            # one the sheet still has
+            for row, key in op_keys.items():
+                keys.setdefault(row, key)
+        payload = (cells, keys)
+    else:
+        # Each delete shifts the rows after it, so keys stay with their run
+        payload = (
+            [r for _, ranges, _ in run for r in ranges],
+            [keys for _, ranges, keys in run for _ in ranges],
+        )
+
+    return kind, payload, len(run)
+
+
+# -------------------------
+# Queue
+# -------------------------
+
+class WriteQueue:
+    """
+    Write-behind queue for one tab.
+
+    put() only records the write; a background thread sends merged batches
+    through `send(kind, payload)`, one quota token per request. Retryable
+    errors are retried with backoff; once `max_attempts` runs out
+    everything still queued is dropped. Any other error sends the writes
+    of the failed batch one at a time, so only the one Google refuses is
+    dropped. Either way `on_failure(error)` is called so the tab can
+    reload itself.
+    """
+
+    def __init__(self, name, send, on_failure, quota=write_quota,
+                 flush_size=FLUSH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.name = name
+        self.send = send
+        self.on_failure = on_failure
+        self.quota = quota
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.pending = []
+        self._lock = threading.Lock()
+        self._flushing = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        with self._lock:
+            return len(self.pending)
+
+    def put(self, op):
+        with self._lock:
+            self.pending.append(op)
+            if len(self.pending) >= self.flush_size:
+                self._wakeup.set()
+
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f"write-queue-{self.name}", daemon=True,
+                )
+                self._thread.start()
+
+    def clear(self):
+        with self._lock:
+            dropped = len(self.pending)
+            self.pending.clear()
+        return dropped
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Flushing writes to '%s' failed", self.name)
+
+    def flush(self, max_attempts=None):
+        """Send everything queued; gives up after `max_attempts` failed tries if set"""
+        with self._flushing:
+            attempt = 0
+            # Queued writes still to be sent one by one after a failed batch
+            single = 0
+
+            while True:
+                with self._lock:
+                    if not self.pending:
+                        return
+                    kind, payload, count = merge(self.pending[:1] if single else self.pending)
+
+                self.quota.take()
+
+                try:
+                    self.send(kind, payload)
+                except Exception as e:
+                    attempt += 1
+
+                    if is_retryable(e):
+                        if max_attempts is None or attempt < max_attempts:
+                            delay = backoff(attempt)
+                            logger.warning(
+                                "Writing to '%s' failed (%s), retrying in %.1fs",
+                                self.name, e, delay,
+                            )
+                            time.sleep(delay)
+                            continue
+
+                        logger.error(
+                            "Writing to '%s' failed (%s), dropping %d queued writes",
+                            self.name, e, self.clear(),
+                        )
+                        self.on_failure(e)
+                        return
+
+                    attempt = 0
+
+                    if count > 1:
+                        logger.warning(
+                            "Writing %d merged writes to '%s' failed (%s), sending them one at a time",
+                            count, self.name, e,
+                        )
+                        single = count
+                        continue
+
+                    with self._lock:
+                        dropped = self.pending.pop(0)
+                    single = max(single - 1, 0)
+
+                    logger.error("Writing to '%s' failed (%s), dropping %r", self.name, e, dropped)
+                    self.on_failure(e)
+                    continue
+
+                attempt = 0
+                single = max(single - count, 0)
+                with self._lock:
+                    del self.pending[:count]